@@ -0,0 +1,152 @@
+"""
+Per-frame allocation benchmark for the capture -> preprocess -> decode -> encode path.
+
+Compares the original allocation pattern (new capture array, blobFromImage,
+per-row Python lists, jpeg.tobytes() and a concatenated multipart chunk)
+with the pooled path (FrameBufferPool, BlobBuffer, vectorized decoding and
+memoryview output). The network itself is replaced by fixed random outputs
+so no model files are needed. Only buffer handling inside the process is
+measured: the pooled path stops at the part header and the shared frame
+buffer, which the server hands to the socket together with one sendmsg
+call. The cost of streaming to viewers through the running server is
+measured by loadtest.py. Run from the project root:
+
+    python benchmarks/bench_buffers.py --frames 500
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+from detector.yolo import BlobBuffer, decode_person_detections
+from utils.buffers import FrameBufferPool
+
+JPEG_ENCODE_PARAMS = [cv2.IMWRITE_JPEG_QUALITY, 90]
+PART_HEADER = b'\r\n--frame\r\nContent-Type: image/jpeg\r\n'
+
+
+def make_outputs(seed=0):
+    """Fake yolov4-tiny outputs with a handful of confident person rows"""
+    rng = np.random.default_rng(seed)
+    outs = []
+    for rows in (507, 2028):
+        out = rng.random((rows, 85), dtype=np.float32) * 0.1
+        out[:, :4] = rng.random((rows, 4), dtype=np.float32)
+        out[rng.choice(rows, 8, replace=False), 5] = 0.9
+        outs.append(out)
+    return outs
+
+
+def baseline_step(source, outs):
+    frame = source.copy()  # read() without an output array allocates a new frame
+    height, width = frame.shape[:2]
+    blob = cv2.dnn.blobFromImage(frame, 1 / 255.0, (416, 416), swapRB=True, crop=False)
+
+    boxes, confidences = [], []
+    for out in outs:
+        for detection in out:
+            scores = detection[5:]
+            class_id = np.argmax(scores)
+            confidence = scores[class_id]
+            if confidence > 0.5 and class_id == 0:
+                center_x = int(detection[0] * width)
+                center_y = int(detection[1] * height)
+                w = int(detection[2] * width)
+                h = int(detection[3] * height)
+                boxes.append([int(center_x - w / 2), int(center_y - h / 2), w, h])
+                confidences.append(float(confidence))
+
+    _, jpeg = cv2.imencode('.jpg', frame, JPEG_ENCODE_PARAMS)
+    data = jpeg.tobytes()
+    chunk = b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + data + b'\r\n\r\n'
+    return blob, boxes, len(chunk)
+
+
+class PooledPath:
+    def __init__(self):
+        self.pool = FrameBufferPool(3)
+        self.blob_buffer = BlobBuffer((416, 416))
+
+    def step(self, source, outs):
+        def read(buffer):
+            if buffer is None:
+                buffer = np.empty_like(source)
+            np.copyto(buffer, source)  # read(image) fills the reused array
+            return True, buffer
+
+        _, frame = self.pool.read(read)
+        height, width = frame.shape[:2]
+        blob = self.blob_buffer.fill(frame)
+        boxes, confidences = decode_person_detections(outs, width, height, 0.5)
+
+        _, jpeg = cv2.imencode('.jpg', frame, JPEG_ENCODE_PARAMS)
+        payload = memoryview(jpeg.reshape(-1))
+        # Header and frame stay separate buffers (see utils.streaming.send_buffers)
+        header = PART_HEADER + f'Content-Length: {len(payload)}\r\n\r\n'.encode()
+        return blob, boxes, len(header) + len(payload)
+
+
+def measure(step, frames, source, outs):
+    # Timing pass without tracemalloc overhead
+    gc.collect()
+    collections_before = sum(stat['collections'] for stat in gc.get_stats())
+    start = time.perf_counter()
+    for _ in range(frames):
+        step(source, outs)
+    elapsed = time.perf_counter() - start
+    collections = sum(stat['collections'] for stat in gc.get_stats()) - collections_before
+
+    # Allocation pass: transient bytes allocated while processing each frame
+    tracemalloc.start()
+    transient = 0
+    for _ in range(frames):
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        step(source, outs)
+        transient += tracemalloc.get_traced_memory()[1] - current
+    tracemalloc.stop()
+
+    return {
+        "ms_per_frame": 1000 * elapsed / frames,
+        "kb_allocated_per_frame": transient / frames / 1024,
+        "gc_collections_per_1000_frames": 1000 * collections / frames
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare per-frame allocations of the original and pooled paths")
+    parser.add_argument("--frames", type=int, default=300, help="Frames per measurement")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(1)
+    source = cv2.GaussianBlur(rng.integers(0, 255, (args.height, args.width, 3), dtype=np.uint8), (15, 15), 0)
+    outs = make_outputs()
+    pooled = PooledPath()
+
+    # Warm up so one-time allocations are not counted
+    for _ in range(5):
+        baseline_step(source, outs)
+        pooled.step(source, outs)
+
+    results = {
+        "original": measure(baseline_step, args.frames, source, outs),
+        "pooled": measure(pooled.step, args.frames, source, outs)
+    }
+
+    print(f"{'path':<10} {'ms/frame':>9} {'KB alloc/frame':>15} {'GC runs/1k frames':>18}")
+    for name, result in results.items():
+        print(f"{name:<10} {result['ms_per_frame']:>9.2f} {result['kb_allocated_per_frame']:>15.0f} "
+              f"{result['gc_collections_per_1000_frames']:>18.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
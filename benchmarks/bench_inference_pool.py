@@ -0,0 +1,108 @@
+"""
+Inference scaling benchmark: in-process detection vs. the detector worker pool.
+
+Measures throughput and per-frame latency of YOLODetector running in this
+process with different OpenCV thread counts, and of DetectorPool with
+different worker counts, so the scaling curve of a machine can be compared.
+Needs the model files; run from the project root:
+
+    python benchmarks/bench_inference_pool.py --workers 1,2,4,8 --cv-threads 1,2,4
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+from detector.yolo import YOLODetector
+from detector.pool import DetectorPool
+
+
+def make_frames(count, width, height):
+    rng = np.random.default_rng(0)
+    return [cv2.GaussianBlur(rng.integers(0, 255, (height, width, 3), dtype=np.uint8), (9, 9), 0)
+            for _ in range(count)]
+
+
+def bench_in_process(frames, cv_threads):
+    cv2.setNumThreads(cv_threads)
+    detector = YOLODetector()
+    detector.detect(frames[0])
+
+    latencies = []
+    start = time.perf_counter()
+    for frame in frames:
+        frame_start = time.perf_counter()
+        detector.detect(frame)
+        latencies.append(time.perf_counter() - frame_start)
+    elapsed = time.perf_counter() - start
+    return len(frames) / elapsed, statistics.median(latencies) * 1000
+
+
+def bench_pool(frames, workers, cv_threads, max_in_flight):
+    pool = DetectorPool(workers, cv_threads, max_in_flight)
+    try:
+        if pool.wait_ready() < workers:
+            raise RuntimeError("Detector workers did not start")
+
+        submitted_at = {}
+        latencies = []
+        received = []
+        next_frame = 0
+        start = time.perf_counter()
+        while len(received) < len(frames):
+            # Keep every worker busy, then wait for results
+            while next_frame < len(frames) and pool.submit(next_frame, frames[next_frame], 0.5):
+                submitted_at[next_frame] = time.perf_counter()
+                next_frame += 1
+            for seq, _, _, error, _ in pool.collect(timeout=1.0):
+                if error:
+                    raise RuntimeError(error)
+                latencies.append(time.perf_counter() - submitted_at[seq])
+                received.append(seq)
+        elapsed = time.perf_counter() - start
+    finally:
+        pool.close()
+
+    if received != sorted(received):
+        raise RuntimeError("Results were not released in frame order")
+    return len(frames) / elapsed, statistics.median(latencies) * 1000
+
+
+def parse_list(value):
+    return [int(item) for item in value.split(',') if item.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report the inference scaling curve")
+    parser.add_argument("--frames", type=int, default=100, help="Frames per measurement")
+    parser.add_argument("--workers", default="1,2,4", help="Comma separated pool sizes")
+    parser.add_argument("--cv-threads", default="1,2,4", help="Comma separated OpenCV thread counts")
+    parser.add_argument("--max-in-flight", type=int, default=2, help="Frames queued per worker")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    args = parser.parse_args(argv)
+
+    frames = make_frames(args.frames, args.width, args.height)
+    print(f"{os.cpu_count()} CPU(s), {args.frames} frames of {args.width}x{args.height}")
+    print(f"{'mode':<12} {'workers':>7} {'cv threads':>10} {'fps':>8} {'p50 ms':>8} {'speedup':>8}")
+
+    baseline = None
+    for cv_threads in parse_list(args.cv_threads):
+        fps, latency = bench_in_process(frames, cv_threads)
+        baseline = baseline or fps
+        print(f"{'in-process':<12} {'-':>7} {cv_threads:>10} {fps:>8.1f} {latency:>8.1f} {fps / baseline:>7.2f}x")
+
+    for cv_threads in parse_list(args.cv_threads):
+        for workers in parse_list(args.workers):
+            fps, latency = bench_pool(frames, workers, cv_threads, args.max_in_flight)
+            print(f"{'pool':<12} {workers:>7} {cv_threads:>10} {fps:>8.1f} {latency:>8.1f} {fps / baseline:>7.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
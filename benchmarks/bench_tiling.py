@@ -0,0 +1,96 @@
+"""
+Tiled inference benchmark: whole-frame detection vs. overlapping tiles.
+
+For each frame size, runs YOLODetector on the whole frame and in tiled mode
+and reports the number of tiles, the total latency and its average per tile
+(the tiles share one batched forward pass, so there is no true per-tile
+latency), throughput and the scale the network sees people at (network pixels
+per frame pixel along the frame width; a person must be roughly 20+ network
+pixels tall for yolov4-tiny to find them). Frames are random unless --image
+is given, in which case detection counts are reported too.
+Needs the model files; run from the project root:
+
+    python benchmarks/bench_tiling.py --sizes 640x480,1280x720,1920x1080 --image lobby.jpg
+"""
+import argparse
+import os
+import statistics
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+from detector.yolo import YOLODetector
+
+
+def make_frame(width, height, image=None):
+    if image is not None:
+        return cv2.resize(image, (width, height))
+    rng = np.random.default_rng(0)
+    return cv2.GaussianBlur(rng.integers(0, 255, (height, width, 3), dtype=np.uint8), (9, 9), 0)
+
+
+def measure(detector, frame, frames):
+    detector.detect(frame)
+    timings = []
+    for _ in range(frames):
+        detections = detector.detect(frame)
+        timings.append(detector.last_timings)
+    total_ms = statistics.median(timing["total_ms"] for timing in timings)
+    tile_avg_ms = statistics.median(timing["tile_avg_ms"] for timing in timings)
+    return timings[-1]["tiles"], total_ms, tile_avg_ms, len(detections)
+
+
+def parse_sizes(value):
+    return [tuple(int(part) for part in size.split('x')) for size in value.split(',') if size.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare whole-frame and tiled detection")
+    parser.add_argument("--frames", type=int, default=20, help="Frames per measurement")
+    parser.add_argument("--sizes", default="640x480,1280x720,1920x1080", help="Comma separated WxH frame sizes")
+    parser.add_argument("--tile-size", type=int, help="Tile size in pixels (default: config TILE_SIZE)")
+    parser.add_argument("--overlap", type=int, help="Tile overlap in pixels (default: config TILE_OVERLAP)")
+    parser.add_argument("--no-full-frame", action="store_true", help="Do not add the whole frame to the tile batch")
+    parser.add_argument("--image", help="Image to detect on instead of random frames")
+    parser.add_argument("--cv-threads", type=int, help="OpenCV thread count")
+    args = parser.parse_args(argv)
+
+    if args.cv_threads is not None:
+        cv2.setNumThreads(args.cv_threads)
+    image = None
+    if args.image:
+        image = cv2.imread(args.image)
+        if image is None:
+            print(f"Could not read {args.image}", file=sys.stderr)
+            return 1
+
+    detector = YOLODetector()
+    if args.tile_size:
+        detector.tile_size = args.tile_size
+    if args.overlap is not None:
+        detector.tile_overlap = args.overlap
+    if args.no_full_frame:
+        detector.tile_full_frame = False
+    network_width = detector.blob_buffer.size[0]
+
+    print(f"{os.cpu_count()} CPU(s), tile size {detector.tile_size}, overlap {detector.tile_overlap}, "
+          f"full frame {'on' if detector.tile_full_frame else 'off'}")
+    print(f"{'size':<11} {'mode':<7} {'tiles':>5} {'total ms':>9} {'avg/tile':>8} {'fps':>6} "
+          f"{'scale':>6} {'people':>6}")
+
+    for width, height in parse_sizes(args.sizes):
+        frame = make_frame(width, height, image)
+        for tiled in (False, True):
+            detector.tiled = tiled
+            tiles, total_ms, tile_avg_ms, people = measure(detector, frame, args.frames)
+            scale = network_width / (min(detector.tile_size, width) if tiled else width)
+            print(f"{f'{width}x{height}':<11} {'tiled' if tiled else 'whole':<7} {tiles:>5} {total_ms:>9.1f} "
+                  f"{tile_avg_ms:>8.1f} {1000 / total_ms:>6.1f} {scale:>6.2f} "
+                  f"{people if image is not None else '-':>6}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
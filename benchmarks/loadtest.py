@@ -0,0 +1,282 @@
+"""
+Web-tier load test for the MJPEG stream and Socket.IO broadcasts.
+
+Starts the web app against the synthetic capture source (no camera needed),
+then ramps up concurrent MJPEG viewers and Socket.IO clients step by step and
+reports delivered FPS, frame age, event latency and server CPU/memory for
+each step. Run from the project root:
+
+    python benchmarks/loadtest.py --viewers 1,5,10,20 --sockets 0,25,50,100
+
+Socket.IO clients need the python-socketio client extras
+(pip install "python-socketio[client]").
+"""
+import argparse
+import http.client
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+try:
+    import socketio
+except ImportError:
+    socketio = None
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class MJPEGViewer(threading.Thread):
+    """Reads /video_feed like a browser and records frame arrivals and ages"""
+
+    def __init__(self, base_url):
+        super().__init__(daemon=True)
+        self.url = urllib.parse.urlparse(base_url)
+        self.lock = threading.Lock()
+        self.frames = 0
+        self.ages = []
+        self.errors = 0
+        self.running = True
+
+    def run(self):
+        while self.running:
+            try:
+                self._stream()
+            except Exception:
+                with self.lock:
+                    self.errors += 1
+                time.sleep(0.5)
+
+    def _stream(self):
+        connection = http.client.HTTPConnection(self.url.hostname, self.url.port, timeout=10)
+        connection.request("GET", "/video_feed")
+        response = connection.getresponse()
+        while self.running:
+            # Part headers, terminated by an empty line
+            headers = {}
+            line = response.readline()
+            while line in (b'\r\n', b'--frame\r\n'):
+                line = response.readline()
+            while line not in (b'\r\n', b''):
+                name, _, value = line.decode().partition(':')
+                headers[name.strip().lower()] = value.strip()
+                line = response.readline()
+            if not line:
+                break
+
+            response.read(int(headers['content-length']))
+            with self.lock:
+                self.frames += 1
+                if 'x-frame-timestamp' in headers:
+                    self.ages.append(time.time() - float(headers['x-frame-timestamp']))
+        connection.close()
+
+    def collect(self):
+        """Return and reset the counters for the current step"""
+        with self.lock:
+            frames, ages, errors = self.frames, self.ages, self.errors
+            self.frames, self.ages, self.errors = 0, [], 0
+        return frames, ages, errors
+
+
+class SocketClient:
+    """Socket.IO client that records broadcast arrivals and latency"""
+
+    def __init__(self, base_url):
+        self.lock = threading.Lock()
+        self.events = 0
+        self.latencies = []
+        self.client = socketio.Client(reconnection=True)
+        self.client.on('stats_update', self._on_stats)
+        self.client.on('detections', self._on_detections)
+        self.client.connect(base_url, transports=['websocket'])
+
+    def _on_stats(self, data):
+        with self.lock:
+            self.events += 1
+
+    def _on_detections(self, meta):
+        with self.lock:
+            self.events += 1
+            self.latencies.append(time.time() - meta['ts'])
+
+    def collect(self):
+        with self.lock:
+            events, latencies = self.events, self.latencies
+            self.events, self.latencies = 0, []
+        return events, latencies
+
+    def close(self):
+        self.client.disconnect()
+
+
+class ProcessSampler:
+    """Reads CPU time and resident memory of a process from /proc"""
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.ticks = os.sysconf('SC_CLK_TCK')
+        self.last_cpu = self._cpu_seconds()
+        self.last_time = time.time()
+
+    def _cpu_seconds(self):
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        # utime and stime are fields 14 and 15 of /proc/<pid>/stat
+        return (int(fields[11]) + int(fields[12])) / self.ticks
+
+    def sample(self):
+        """Return (CPU percent since the last sample, RSS in MB)"""
+        cpu, now = self._cpu_seconds(), time.time()
+        percent = 100.0 * (cpu - self.last_cpu) / max(now - self.last_time, 1e-6)
+        self.last_cpu, self.last_time = cpu, now
+
+        rss_mb = 0.0
+        with open(f"/proc/{self.pid}/status") as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    rss_mb = int(line.split()[1]) / 1024
+        return percent, rss_mb
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def start_server(port):
+    env = dict(os.environ, PERSON_COUNTER_CAMERA="synthetic", PERSON_COUNTER_PORT=str(port))
+    server = subprocess.Popen([sys.executable, os.path.join("src", "web_app.py")], cwd=PROJECT_ROOT,
+                              env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("Web app exited during startup (are the model files present?)")
+        try:
+            urllib.request.urlopen(base_url + "/", timeout=1).close()
+            return server, base_url
+        except OSError:
+            time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError("Web app did not start within 60 seconds")
+
+
+def parse_steps(value):
+    return [int(step) for step in value.split(',') if step.strip()]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the MJPEG stream and Socket.IO broadcasts")
+    parser.add_argument("--viewers", default="1,5,10,20", help="Comma separated MJPEG viewer counts per step")
+    parser.add_argument("--sockets", default="0,10,25,50", help="Comma separated Socket.IO client counts per step")
+    parser.add_argument("--step-seconds", type=float, default=15.0, help="Measurement window per step")
+    parser.add_argument("--port", type=int, default=5055, help="Port for the spawned web app")
+    parser.add_argument("--url", help="Test an already running server instead of spawning one")
+    parser.add_argument("--server-pid", type=int, help="PID of the server given with --url, for CPU/memory")
+    parser.add_argument("--tracking", action="store_true", help="Enable detection during the test")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    viewer_steps = parse_steps(args.viewers)
+    socket_steps = parse_steps(args.sockets)
+    if (any(socket_steps) or args.tracking) and socketio is None:
+        print("python-socketio client is not installed; run with --sockets 0 or install it", file=sys.stderr)
+        return 1
+
+    # Pad the shorter ramp with its last value
+    steps = max(len(viewer_steps), len(socket_steps))
+    viewer_steps += [viewer_steps[-1]] * (steps - len(viewer_steps))
+    socket_steps += [socket_steps[-1]] * (steps - len(socket_steps))
+
+    server = None
+    if args.url:
+        base_url, pid = args.url.rstrip('/'), args.server_pid
+    else:
+        server, base_url = start_server(args.port)
+        pid = server.pid
+    sampler = ProcessSampler(pid) if pid else None
+
+    viewers, sockets, results = [], [], []
+    control = None
+    try:
+        if args.tracking:
+            control = socketio.Client()
+            control.connect(base_url, transports=['websocket'])
+            control.emit('toggle_tracking', {'tracking': True})
+            sockets.append(SocketClient(base_url))
+
+        print(f"{'viewers':>7} {'sockets':>7} {'fps/viewer':>10} {'min fps':>8} {'age p50':>8} {'age p95':>8} "
+              f"{'ev/s/cli':>8} {'lat p50':>8} {'lat p95':>8} {'cpu %':>6} {'rss MB':>7} {'errors':>6}")
+        for viewer_count, socket_count in zip(viewer_steps, socket_steps):
+            while len(viewers) < viewer_count:
+                viewer = MJPEGViewer(base_url)
+                viewer.start()
+                viewers.append(viewer)
+            while len(sockets) < socket_count:
+                sockets.append(SocketClient(base_url))
+
+            # Discard the ramp-up period, then measure one window
+            time.sleep(2)
+            for client in viewers + sockets:
+                client.collect()
+            if sampler:
+                sampler.sample()
+            time.sleep(args.step_seconds)
+
+            viewer_stats = [viewer.collect() for viewer in viewers]
+            socket_stats = [client.collect() for client in sockets]
+            cpu, rss = sampler.sample() if sampler else (0.0, 0.0)
+
+            fps = [frames / args.step_seconds for frames, _, _ in viewer_stats]
+            ages = [age for _, viewer_ages, _ in viewer_stats for age in viewer_ages]
+            latencies = [latency for _, client_latencies in socket_stats for latency in client_latencies]
+            event_rates = [events / args.step_seconds for events, _ in socket_stats]
+            result = {
+                "viewers": len(viewers),
+                "sockets": len(sockets),
+                "fps_per_viewer": statistics.mean(fps) if fps else 0.0,
+                "min_fps": min(fps) if fps else 0.0,
+                "frame_age_p50_ms": percentile(ages, 0.5) * 1000,
+                "frame_age_p95_ms": percentile(ages, 0.95) * 1000,
+                "events_per_client_per_s": statistics.mean(event_rates) if event_rates else 0.0,
+                "event_latency_p50_ms": percentile(latencies, 0.5) * 1000,
+                "event_latency_p95_ms": percentile(latencies, 0.95) * 1000,
+                "server_cpu_percent": cpu,
+                "server_rss_mb": rss,
+                "viewer_errors": sum(errors for _, _, errors in viewer_stats)
+            }
+            results.append(result)
+            print(f"{result['viewers']:>7} {result['sockets']:>7} {result['fps_per_viewer']:>10.1f} "
+                  f"{result['min_fps']:>8.1f} {result['frame_age_p50_ms']:>8.0f} {result['frame_age_p95_ms']:>8.0f} "
+                  f"{result['events_per_client_per_s']:>8.1f} {result['event_latency_p50_ms']:>8.0f} "
+                  f"{result['event_latency_p95_ms']:>8.0f} {cpu:>6.0f} {rss:>7.0f} {result['viewer_errors']:>6}")
+    finally:
+        for viewer in viewers:
+            viewer.running = False
+        for client in sockets:
+            client.close()
+        if control:
+            control.disconnect()
+        if server:
+            server.terminate()
+            server.wait(timeout=10)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
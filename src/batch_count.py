@@ -0,0 +1,275 @@
+"""
+Headless batch person counting for recorded video.
+
+Runs YOLODetector and PersonCounter over video files (or directories of
+videos) without starting the web server, spreading the work over a process
+pool by file and by segment. Run from the project root so the model files
+resolve, for example:
+
+    python src/batch_count.py recordings/ --workers 8 --format csv -o counts.csv
+"""
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import cv2
+
+from detector.yolo import YOLODetector
+from counter.counter import PersonCounter
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.mov', '.mjpeg', '.mjpg', '.h264')
+SENSITIVITY_VALUES = {
+    "Low": 0.4,
+    "Medium": 0.5,
+    "High": 0.6
+}
+
+# Per-process detector, created once by the pool initializer
+worker_detector = None
+
+
+def find_videos(inputs):
+    """Expand files and directories into a sorted list of video files"""
+    videos = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                videos.extend(os.path.join(root, name) for name in files
+                              if name.lower().endswith(VIDEO_EXTENSIONS))
+        elif os.path.isfile(path):
+            videos.append(path)
+        else:
+            print(f"Warning: {path} does not exist, skipping", file=sys.stderr)
+    return sorted(videos)
+
+
+def plan_segments(path, segment_seconds, warmup_frames):
+    """
+    Split a video into frame ranges; each segment starts warmup_frames early to prime the tracker.
+
+    Raw streams (.mjpeg, .h264) have no frame count, so they become a single
+    segment that is read sequentially to the end (its "end" is None).
+    """
+    capture = cv2.VideoCapture(path)
+    if not capture.isOpened():
+        print(f"Warning: could not open {path}, skipping", file=sys.stderr)
+        return []
+    fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+    total_frames = int(capture.get(cv2.CAP_PROP_FRAME_COUNT))
+    capture.release()
+
+    if total_frames <= 0:
+        print(f"Warning: {path} does not report its length, processing it as one segment", file=sys.stderr)
+        return [{"path": path, "index": 0, "fps": fps, "start": 0, "end": None, "warmup_start": 0}]
+
+    segment_frames = max(1, int(segment_seconds * fps))
+    segments = []
+    for index, start in enumerate(range(0, total_frames, segment_frames)):
+        segments.append({
+            "path": path,
+            "index": index,
+            "fps": fps,
+            "start": start,
+            "end": min(start + segment_frames, total_frames),
+            "warmup_start": max(0, start - warmup_frames)
+        })
+    return segments
+
+
+def init_worker(confidence_threshold, cv_threads, tiled=False):
+    global worker_detector
+    # Parallelism comes from the pool, keep OpenCV from oversubscribing the cores
+    cv2.setNumThreads(cv_threads)
+    worker_detector = YOLODetector()
+    worker_detector.confidence_threshold = confidence_threshold
+    if tiled:
+        worker_detector.tiled = True
+
+
+def process_segment(segment, frame_step=1):
+    """
+    Count people in one segment and aggregate the results per second of video.
+
+    The frames before the segment start (the warm-up) only feed the tracker, so
+    people already visible at the boundary keep the track they had in the
+    previous segment and are not reported again as new tracks. Returns the
+    segment, the per-second buckets, the number of frames run through the
+    detector (warm-up excluded) and the number of video frames covered.
+    """
+    capture = cv2.VideoCapture(segment["path"])
+    capture.set(cv2.CAP_PROP_POS_FRAMES, segment["warmup_start"])
+    counter = PersonCounter()
+    fps = segment["fps"]
+    seconds = {}
+    warmup_ids = set()
+    seen_ids = set()
+    processed = 0
+    covered = 0
+
+    if segment["end"] is None:
+        frame_indices = itertools.count(segment["warmup_start"])
+    else:
+        frame_indices = range(segment["warmup_start"], segment["end"])
+
+    for frame_index in frame_indices:
+        if (frame_index - segment["warmup_start"]) % frame_step:
+            # Skipped frames are grabbed without decoding
+            if not capture.grab():
+                break
+            continue
+
+        success, frame = capture.read()
+        if not success:
+            break
+
+        detections = worker_detector.detect(frame)
+        count = counter.update(detections)
+
+        if frame_index < segment["start"]:
+            warmup_ids.update(counter.track_ids)
+            continue
+        processed += 1
+        covered = frame_index + 1 - segment["start"]
+
+        second = int(frame_index // fps)
+        bucket = seconds.get(second)
+        if bucket is None:
+            bucket = seconds[second] = {"frames": 0, "min": count, "max": count, "sum": 0, "new_tracks": 0}
+        bucket["frames"] += 1
+        bucket["min"] = min(bucket["min"], count)
+        bucket["max"] = max(bucket["max"], count)
+        bucket["sum"] += count
+
+        for track_id in counter.track_ids:
+            if track_id not in seen_ids and track_id not in warmup_ids:
+                bucket["new_tracks"] += 1
+            seen_ids.add(track_id)
+
+    capture.release()
+    return segment, seconds, processed, covered
+
+
+def _process_task(task):
+    segment, frame_step = task
+    return process_segment(segment, frame_step)
+
+
+def merge_seconds(target, seconds):
+    """Merge per-second buckets; a second can straddle two segments"""
+    for second, bucket in seconds.items():
+        existing = target.get(second)
+        if existing is None:
+            target[second] = dict(bucket)
+            continue
+        existing["frames"] += bucket["frames"]
+        existing["min"] = min(existing["min"], bucket["min"])
+        existing["max"] = max(existing["max"], bucket["max"])
+        existing["sum"] += bucket["sum"]
+        existing["new_tracks"] += bucket["new_tracks"]
+
+
+def build_rows(results):
+    rows = []
+    for path in sorted(results):
+        for second, bucket in sorted(results[path].items()):
+            rows.append({
+                "file": path,
+                "second": second,
+                "video_time": time.strftime('%H:%M:%S', time.gmtime(second)),
+                "frames": bucket["frames"],
+                "min": bucket["min"],
+                "avg": round(bucket["sum"] / bucket["frames"], 2),
+                "max": bucket["max"],
+                "new_tracks": bucket["new_tracks"]
+            })
+    return rows
+
+
+def write_rows(rows, output_format, output):
+    if output_format == "ndjson":
+        for row in rows:
+            output.write(json.dumps(row) + "\n")
+        return
+
+    writer = csv.DictWriter(output, fieldnames=["file", "second", "video_time", "frames",
+                                                "min", "avg", "max", "new_tracks"])
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Count people in recorded video without the web server")
+    parser.add_argument("inputs", nargs="+", help="Video files or directories containing videos")
+    parser.add_argument("-o", "--output", help="Output file (default: stdout)")
+    parser.add_argument("--format", choices=["csv", "ndjson"], default="csv", help="Output format")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of worker processes")
+    parser.add_argument("--cv-threads", type=int, default=1, help="OpenCV threads per worker")
+    parser.add_argument("--segment-seconds", type=float, default=60.0,
+                        help="Length of the segments a video is split into")
+    parser.add_argument("--warmup-frames", type=int, default=15,
+                        help="Frames before each segment used to prime the tracker")
+    parser.add_argument("--frame-step", type=int, default=1, help="Process every Nth frame")
+    parser.add_argument("--sensitivity", choices=list(SENSITIVITY_VALUES), default="Medium",
+                        help="Detection sensitivity")
+    parser.add_argument("--tiled", action="store_true",
+                        help="Detect on overlapping tiles (for high-resolution or wide-angle footage)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    videos = find_videos(args.inputs)
+    if not videos:
+        print("No video files found", file=sys.stderr)
+        return 1
+
+    segments = []
+    for path in videos:
+        segments.extend(plan_segments(path, args.segment_seconds, args.warmup_frames))
+    total_frames = sum(segment["end"] - segment["start"] for segment in segments if segment["end"] is not None)
+    unknown_length = sum(1 for segment in segments if segment["end"] is None)
+    print(f"Processing {len(videos)} file(s), {len(segments)} segment(s), {total_frames} frames"
+          + (f" plus {unknown_length} stream(s) of unknown length" if unknown_length else "")
+          + f" with {args.workers} worker(s)", file=sys.stderr)
+
+    results = {path: {} for path in videos}
+    processed_frames = 0
+    video_seconds = 0.0
+    start_time = time.time()
+    tasks = [(segment, max(1, args.frame_step)) for segment in segments]
+
+    with multiprocessing.Pool(args.workers, initializer=init_worker,
+                              initargs=(SENSITIVITY_VALUES[args.sensitivity], args.cv_threads, args.tiled)) as pool:
+        for done, (segment, seconds, processed, covered) in enumerate(pool.imap_unordered(_process_task, tasks), 1):
+            merge_seconds(results[segment["path"]], seconds)
+            processed_frames += processed
+            video_seconds += covered / segment["fps"]
+            elapsed = time.time() - start_time
+            print(f"[{done}/{len(segments)}] {os.path.basename(segment['path'])} segment {segment['index']} "
+                  f"done, {processed_frames / elapsed:.1f} frames/s", file=sys.stderr)
+
+    rows = build_rows(results)
+    if args.output:
+        with open(args.output, "w", newline="") as f:
+            write_rows(rows, args.format, f)
+    else:
+        write_rows(rows, args.format, sys.stdout)
+
+    elapsed = time.time() - start_time
+    print(f"Processed {processed_frames} frames ({video_seconds:.0f}s of video) in {elapsed:.1f}s: "
+          f"{processed_frames / elapsed:.1f} frames/s, {video_seconds / elapsed:.1f}x real time",
+          file=sys.stderr)
+
+    unread = [path for path in videos if not results[path]]
+    for path in unread:
+        print(f"Warning: no frames could be read from {path}", file=sys.stderr)
+    return 1 if unread else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
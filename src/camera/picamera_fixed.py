@@ -3,8 +3,14 @@ import numpy as np
 import time
 import subprocess
 import glob
+import logging
 import os
-import sys
+
+from utils.buffers import FrameBufferPool
+from utils.profiler import profile_stage
+from config import FRAME_BUFFER_COUNT, CAMERA_RESOLUTION, FRAME_RATE
+
+logger = logging.getLogger(__name__)
 
 class Camera:
     @staticmethod
@@ -25,40 +31,26 @@ class Camera:
         
         # Get all video devices from /dev
         devices = glob.glob('/dev/video*')
-        print(f"Found video devices: {devices}")
+        logger.debug("Found video devices: %s", devices)
         
         # Test if we can even access video0 without using OpenCV
         primary_device = '/dev/video0'
         if primary_device in devices and Camera.check_device_exists(primary_device):
-            # Try to open it without causing OpenCV warnings
+            # OpenCV's own warnings are limited by OPENCV_LOG_LEVEL (see utils.log)
             try:
-                # Redirect stderr temporarily to suppress OpenCV warnings
-                old_stderr = sys.stderr
-                sys.stderr = open(os.devnull, 'w')
-                
-                try:
-                    # Try to open the camera with index 0 (typically maps to video0)
-                    cap = cv2.VideoCapture(0)
-                    if cap.isOpened():
-                        # Just add it without trying to read a frame
-                        available_cameras.append(primary_device)
-                        cap.release()
-                        devices_checked.add(primary_device)
-                        # Don't print success message here to reduce output
-                except:
-                    pass
-                
-                # Restore stderr
-                sys.stderr.close()
-                sys.stderr = old_stderr
-                
-            except:
-                # If anything goes wrong with stderr redirection, continue quietly
-                pass
+                # Try to open the camera with index 0 (typically maps to video0)
+                cap = cv2.VideoCapture(0)
+                if cap.isOpened():
+                    # Just add it without trying to read a frame
+                    available_cameras.append(primary_device)
+                    cap.release()
+                    devices_checked.add(primary_device)
+            except Exception:
+                logger.debug("Probing %s failed", primary_device, exc_info=True)
         
         # If we found video0 and it works, just return that
         if primary_device in available_cameras:
-            print(f"Using primary camera: {primary_device}")
+            logger.info("Using primary camera: %s", primary_device)
             return available_cameras
             
         # Check only first three cameras to avoid too many warnings
@@ -82,9 +74,9 @@ class Camera:
         
         # Return whatever cameras we found, may be empty
         if available_cameras:
-            print(f"Found camera device(s): {available_cameras}")
+            logger.info("Found camera device(s): %s", available_cameras)
         else:
-            print("No camera devices could be found or accessed")
+            logger.warning("No camera devices could be found or accessed")
         
         return available_cameras
 
@@ -94,6 +86,7 @@ class Camera:
         self.camera = None
         self.is_running = False
         self.backup_index = 0  # Fallback to index 0 if device path fails
+        self.frame_pool = FrameBufferPool(FRAME_BUFFER_COUNT)  # Capture into reused arrays
         
         # Check if device exists before even trying to use it
         device_exists = os.path.exists(self.device_path)
@@ -103,50 +96,50 @@ class Camera:
         
         # If no cameras are found but the requested device exists
         if not available_cameras and device_exists:
-            print(f"Warning: Camera device {self.device_path} exists but may be in use.")
-            print(f"Will attempt to use it directly during start_camera().")
+            logger.warning("Camera device %s exists but may be in use; will attempt to use it directly",
+                           self.device_path)
         # If no cameras are found and the requested device doesn't exist
         elif not available_cameras and not device_exists:
-            print(f"Warning: No camera devices found and {self.device_path} doesn't exist.")
-            print("Will try fallback methods during start_camera().")
+            logger.warning("No camera devices found and %s doesn't exist; will try fallback methods",
+                           self.device_path)
         # If the requested camera isn't in the available list but others are
         elif self.device_path not in available_cameras and available_cameras:
-            print(f"Warning: Requested camera {self.device_path} not in available list")
-            print(f"Will try requested camera first, then fall back to {available_cameras[0]}")
+            logger.warning("Requested camera %s not in available list; will fall back to %s",
+                           self.device_path, available_cameras[0])
             self.backup_device = available_cameras[0]
     
     def start_camera(self):
         if self.is_running:
             return
             
-        print(f"Attempting to open camera device {self.device_path}")
+        logger.info("Attempting to open camera device %s", self.device_path)
         
         # First attempt - try with the requested device path
         self.camera = None
         try:
             self.camera = cv2.VideoCapture(self.device_path)
             if self.camera.isOpened():
-                print(f"Successfully opened camera with device path: {self.device_path}")
+                logger.info("Opened camera with device path: %s", self.device_path)
                 self._configure_camera()
                 self.is_running = True
                 return
         except Exception as e:
-            print(f"Failed to open camera with device path: {str(e)}")
+            logger.warning("Failed to open camera with device path: %s", e)
             if self.camera:
                 self.camera.release()
                 self.camera = None
         
         # Second attempt - try with the camera index
         try:
-            print(f"Trying to open camera with index: {self.camera_id}")
+            logger.info("Trying to open camera with index: %s", self.camera_id)
             self.camera = cv2.VideoCapture(self.camera_id)
             if self.camera.isOpened():
-                print(f"Successfully opened camera with index: {self.camera_id}")
+                logger.info("Opened camera with index: %s", self.camera_id)
                 self._configure_camera()
                 self.is_running = True
                 return
         except Exception as e:
-            print(f"Failed to open camera with index: {str(e)}")
+            logger.warning("Failed to open camera with index: %s", e)
             if self.camera:
                 self.camera.release()
                 self.camera = None
@@ -154,30 +147,30 @@ class Camera:
         # Third attempt - try with backup device if available
         if hasattr(self, 'backup_device'):
             try:
-                print(f"Trying backup camera: {self.backup_device}")
+                logger.info("Trying backup camera: %s", self.backup_device)
                 self.camera = cv2.VideoCapture(self.backup_device)
                 if self.camera.isOpened():
-                    print(f"Successfully opened backup camera: {self.backup_device}")
+                    logger.info("Opened backup camera: %s", self.backup_device)
                     self._configure_camera()
                     self.is_running = True
                     return
             except Exception as e:
-                print(f"Failed to open backup camera: {str(e)}")
+                logger.warning("Failed to open backup camera: %s", e)
                 if self.camera:
                     self.camera.release()
                     self.camera = None
         
         # Last resort - just try index 0
         try:
-            print("Last resort: trying camera index 0")
+            logger.info("Last resort: trying camera index 0")
             self.camera = cv2.VideoCapture(0)
             if self.camera.isOpened():
-                print("Successfully opened camera at index 0")
+                logger.info("Opened camera at index 0")
                 self._configure_camera()
                 self.is_running = True
                 return
         except Exception as e:
-            print(f"Failed to open camera at index 0: {str(e)}")
+            logger.warning("Failed to open camera at index 0: %s", e)
             if self.camera:
                 self.camera.release()
                 self.camera = None
@@ -191,43 +184,45 @@ class Camera:
             return False
             
         try:
-            # Set a smaller resolution to start with
-            self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-            self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-            self.camera.set(cv2.CAP_PROP_FPS, 30)
+            # Request the configured resolution; the driver may pick the nearest it supports
+            width, height = CAMERA_RESOLUTION
+            self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            self.camera.set(cv2.CAP_PROP_FPS, FRAME_RATE)
             
             # Try to read a test frame but don't raise exception if it fails
             ret, frame = self.camera.read()
             if not ret:
-                print("Warning: Could not read test frame from camera")
+                logger.warning("Could not read test frame from camera")
                 return False
                 
             return True
         except Exception as e:
-            print(f"Warning: Could not configure camera: {str(e)}")
+            logger.warning("Could not configure camera: %s", e)
             return False
     
+    @profile_stage("capture")
     def capture_frame(self):
         if not self.is_running:
             try:
                 self.start_camera()
             except Exception as e:
-                print(f"Failed to start camera for capture: {e}")
+                logger.error("Failed to start camera for capture: %s", e)
                 return False, None
         
         if not self.camera:
             return False, None
         
         try:
-            success, frame = self.camera.read()
+            success, frame = self.frame_pool.read(self.camera.read)
             if not success:
-                print(f"Failed to capture frame")
+                logger.warning("Failed to capture frame", extra={"device": self.device_path})
                 # Try to recover by restarting the camera
                 try:
                     self.stop_camera()
                     time.sleep(1)
                     self.start_camera()
-                    success, frame = self.camera.read()
+                    success, frame = self.frame_pool.read(self.camera.read)
                 except Exception:
                     pass
                     
@@ -235,7 +230,7 @@ class Camera:
                     return False, None
             return True, frame
         except Exception as e:
-            print(f"Error capturing frame: {str(e)}")
+            logger.exception("Error capturing frame")
             return False, None
     
     def stop_camera(self):
@@ -243,10 +238,10 @@ class Camera:
             try:
                 self.camera.release()
             except Exception as e:
-                print(f"Error releasing camera: {e}")
+                logger.warning("Error releasing camera: %s", e)
             self.camera = None
             self.is_running = False
-            print("Camera stopped")
+            logger.info("Camera stopped")
     
     def __del__(self):
         self.stop_camera()
@@ -0,0 +1,71 @@
+import logging
+import time
+
+import cv2
+import numpy as np
+
+from utils.buffers import FrameBufferPool
+from utils.profiler import profile_stage
+
+logger = logging.getLogger(__name__)
+
+
+class SyntheticCamera:
+    """
+    Camera stand-in that renders moving figures instead of reading a device.
+
+    Implements the same interface as Camera so the web app can run (and be load
+    tested) on machines without a camera. Frames are paced to the configured
+    frame rate like a real device.
+    """
+
+    def __init__(self, camera_id=0, resolution=(640, 480), frame_rate=30, people=3, buffer_count=3):
+        self.camera_id = camera_id
+        self.device_path = f"synthetic:{camera_id}"
+        self.width, self.height = resolution
+        self.frame_interval = 1.0 / frame_rate
+        self.people = people
+        self.is_running = False
+        self.frame_index = 0
+        self.next_frame_time = 0.0
+        self.frame_pool = FrameBufferPool(buffer_count)
+        self.background = np.full((self.height, self.width, 3), 90, dtype=np.uint8)
+        cv2.rectangle(self.background, (0, int(self.height * 0.7)), (self.width, self.height), (60, 70, 60), -1)
+
+    def start_camera(self):
+        self.is_running = True
+        self.next_frame_time = time.time()
+        logger.info("Synthetic camera %s started at %sx%s", self.camera_id, self.width, self.height)
+
+    @profile_stage("capture")
+    def capture_frame(self):
+        if not self.is_running:
+            self.start_camera()
+
+        # Wait for the next frame slot like a real capture device would
+        delay = self.next_frame_time - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        self.next_frame_time = max(self.next_frame_time + self.frame_interval, time.time())
+        return self.frame_pool.read(self._render)
+
+    def _render(self, frame):
+        if frame is None:
+            frame = np.empty_like(self.background)
+        np.copyto(frame, self.background)
+        for person in range(self.people):
+            # Each figure walks back and forth across the frame at its own speed
+            span = self.width - 60
+            position = (self.frame_index * (2 + person)) % (2 * span)
+            x = position if position < span else 2 * span - position
+            y = int(self.height * (0.35 + 0.12 * person)) % (self.height - 120)
+            cv2.rectangle(frame, (x, y + 25), (x + 40, y + 110), (40, 40, 160), -1)
+            cv2.circle(frame, (x + 20, y + 12), 12, (150, 180, 220), -1)
+
+        cv2.putText(frame, time.strftime('%H:%M:%S'), (10, self.height - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+        self.frame_index += 1
+        return True, frame
+
+    def stop_camera(self):
+        self.is_running = False
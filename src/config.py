@@ -1,4 +1,5 @@
 # Configuration settings for the camera person counter system
+import os
 
 # Path to the YOLO model weights
 YOLO_MODEL_PATH = "models/yolo_weights.h5"
@@ -12,11 +13,111 @@ DETECTION_THRESHOLD = 0.5
 # Minimum confidence for counting a person
 COUNTING_CONFIDENCE = 0.6
 
-# Camera settings
+# Camera settings (raise the resolution together with TILED_INFERENCE for wide scenes)
 CAMERA_RESOLUTION = (640, 480)
 FRAME_RATE = 30
 
 # Configuration parameters
 CONFIDENCE_THRESHOLD = 0.5
 NMS_THRESHOLD = 0.4
-WEBCAM_INDEX = 0
\ No newline at end of file
+WEBCAM_INDEX = 0
+
+# Capture source: "device" for a real camera, "synthetic" for generated frames
+# (used for load testing and development on machines without a camera)
+CAMERA_SOURCE = os.environ.get("PERSON_COUNTER_CAMERA", "device")
+
+# Web server port
+WEB_PORT = int(os.environ.get("PERSON_COUNTER_PORT", 5000))
+
+# Draw boxes, count and FPS into the streamed frames. When disabled the stream
+# carries clean frames and browsers draw overlays from the detection metadata.
+SERVER_SIDE_OVERLAY = False
+
+# Error/event registry: number of raise/resolve transitions kept in history and
+# the minimum number of seconds between notifications for the same event
+EVENT_HISTORY_SIZE = 500
+EVENT_EMIT_INTERVAL = 5.0
+
+# Event clip recording: encoded frames are kept in memory (bounded by
+# CLIP_MEMORY_BUDGET bytes) and written to CLIP_OUTPUT_DIR as MJPEG AVI files
+# when the count reaches CLIP_COUNT_THRESHOLD or the camera fails
+CLIP_RECORDING_ENABLED = True
+CLIP_OUTPUT_DIR = "clips"
+CLIP_MEMORY_BUDGET = 64 * 1024 * 1024
+CLIP_PRE_ROLL_SECONDS = 10
+CLIP_POST_ROLL_SECONDS = 10
+CLIP_COUNT_THRESHOLD = 10
+
+# Number of reusable capture buffers (must exceed the frames held at once)
+FRAME_BUFFER_COUNT = 3
+
+# Inference threading. With DETECTOR_WORKERS = 0 detection runs in the web
+# process; otherwise frames are spread over that many worker processes, each
+# running its own network with DETECTOR_CV_THREADS OpenCV threads.
+# OPENCV_THREADS overrides OpenCV's thread count in the web process (None keeps the default).
+DETECTOR_WORKERS = 0
+DETECTOR_CV_THREADS = 1
+DETECTOR_MAX_IN_FLIGHT = 2
+OPENCV_THREADS = None
+
+# Tiled inference: split each frame into overlapping TILE_SIZE x TILE_SIZE pixel
+# tiles (adjacent tiles share at least TILE_OVERLAP pixels) and run them as one
+# batch, so distant people in high-resolution frames are not shrunk away. With
+# TILE_INCLUDE_FULL_FRAME the downscaled whole frame is added to the batch to
+# catch people larger than a tile. Cost grows with the number of tiles.
+TILED_INFERENCE = False
+TILE_SIZE = 416
+TILE_OVERLAP = 64
+TILE_INCLUDE_FULL_FRAME = True
+
+# Count API: longest a /api/count/poll request may wait for a change, and the
+# interval of keep-alive comments on idle /api/count/stream connections (seconds)
+COUNT_POLL_MAX_TIMEOUT = 60
+COUNT_STREAM_KEEPALIVE = 15
+
+# With no consumers the capture pipeline sleeps; this is how often (seconds) it
+# wakes to check for due log entries and finished clips
+PIPELINE_IDLE_INTERVAL = 1.0
+# Seconds to wait before retrying after a failed capture
+CAPTURE_RETRY_DELAY = 0.5
+
+# Admin API (profiling). Disabled unless a token is set in the environment;
+# requests must send it as "Authorization: Bearer <token>"
+ADMIN_TOKEN = os.environ.get("PERSON_COUNTER_ADMIN_TOKEN")
+PROFILE_MAX_SECONDS = 60
+PROFILE_SAMPLE_INTERVAL = 0.005
+
+# /snapshot.jpg: frames older than SNAPSHOT_MAX_AGE seconds are refreshed (waiting
+# up to SNAPSHOT_WAIT_TIMEOUT) with a SNAPSHOT_LEASE_SECONDS lease, just long enough
+# for the pipeline to produce one frame. ?width= is rounded up to one of SNAPSHOT_WIDTHS
+# (wider requests get the full frame)
+SNAPSHOT_MAX_AGE = 2.0
+SNAPSHOT_WAIT_TIMEOUT = 3.0
+SNAPSHOT_LEASE_SECONDS = 1
+SNAPSHOT_QUALITY = 85
+SNAPSHOT_WIDTHS = (160, 320, 640, 1280)
+
+# Occupancy heatmap: detection foot points are accumulated on a grid of
+# HEATMAP_GRID (columns, rows) cells. The live map fades with a half-life of
+# HEATMAP_HALF_LIFE seconds; undecayed snapshots are kept per
+# HEATMAP_SNAPSHOT_INTERVAL (HEATMAP_SNAPSHOTS of them, a week of hours)
+HEATMAP_GRID = (64, 48)
+HEATMAP_HALF_LIFE = 3600
+HEATMAP_SNAPSHOT_INTERVAL = 3600
+HEATMAP_SNAPSHOTS = 168
+HEATMAP_RENDER_INTERVAL = 5.0
+
+# Logging: records are queued and written by a background thread, so log calls
+# never wait on console or file I/O. LOG_LEVELS overrides the level of single
+# loggers (e.g. {"camera.picamera_fixed": "DEBUG"}); LOG_FORMAT is "text" or
+# "json". Each message may be logged LOG_RATE_LIMIT_BURST times per
+# LOG_RATE_LIMIT_INTERVAL seconds; the rest are counted and reported as
+# suppressed=N. OPENCV_LOG_LEVEL limits OpenCV's own native output.
+LOG_LEVEL = os.environ.get("PERSON_COUNTER_LOG_LEVEL", "INFO")
+LOG_LEVELS = {}
+LOG_FORMAT = "text"
+LOG_FILE = None
+LOG_QUEUE_SIZE = 10000
+LOG_RATE_LIMIT_INTERVAL = 10.0
+LOG_RATE_LIMIT_BURST = 5
+OPENCV_LOG_LEVEL = "ERROR"
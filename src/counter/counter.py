@@ -1,15 +1,60 @@
 class PersonCounter:
-    def __init__(self):
+    def __init__(self, max_distance=75, max_missed=10):
         self.person_count = 0
         self.tracked_objects = {}
-    
+        self.next_object_id = 0
+        self.track_ids = []
+        # Centroid tracker settings used to keep IDs stable between frames
+        self.max_distance = max_distance
+        self.max_missed = max_missed
+
     def update(self, detections):
         # Update count based on detections
         self.person_count = len(detections)
+        self.track_ids = self._assign_track_ids(detections)
         return self.person_count
 
+    def _assign_track_ids(self, detections):
+        """Match detections to tracked objects by nearest centroid and return their IDs"""
+        centroids = [(x + w / 2, y + h / 2) for x, y, w, h in detections]
+
+        # Greedily pair the closest detection/track combinations first
+        pairs = []
+        for object_id, obj in self.tracked_objects.items():
+            tx, ty = obj["centroid"]
+            for index, (cx, cy) in enumerate(centroids):
+                distance = ((tx - cx) ** 2 + (ty - cy) ** 2) ** 0.5
+                if distance <= self.max_distance:
+                    pairs.append((distance, object_id, index))
+        pairs.sort()
+
+        track_ids = [None] * len(centroids)
+        matched_objects = set()
+        for distance, object_id, index in pairs:
+            if object_id in matched_objects or track_ids[index] is not None:
+                continue
+            track_ids[index] = object_id
+            matched_objects.add(object_id)
+            self.tracked_objects[object_id] = {"centroid": centroids[index], "missed": 0}
+
+        # Age out tracks that were not seen in this frame
+        for object_id in list(self.tracked_objects):
+            if object_id not in matched_objects:
+                self.tracked_objects[object_id]["missed"] += 1
+                if self.tracked_objects[object_id]["missed"] > self.max_missed:
+                    del self.tracked_objects[object_id]
+
+        # Start new tracks for unmatched detections
+        for index, centroid in enumerate(centroids):
+            if track_ids[index] is None:
+                track_ids[index] = self.next_object_id
+                self.tracked_objects[self.next_object_id] = {"centroid": centroid, "missed": 0}
+                self.next_object_id += 1
+
+        return track_ids
+
     def increment_count(self):
         self.person_count += 1
 
     def get_count(self):
-        return self.person_count
\ No newline at end of file
+        return self.person_count
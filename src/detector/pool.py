@@ -0,0 +1,213 @@
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+
+from detector.worker import encode_message, read_message
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "worker.py")
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class ReorderBuffer:
+    """Releases results in the order their frames were submitted"""
+
+    def __init__(self):
+        self.pending = deque()
+        self.results = {}
+
+    def expect(self, seq, context=None):
+        self.pending.append((seq, context))
+
+    def put(self, seq, result):
+        self.results[seq] = result
+
+    def pop_ready(self):
+        ready = []
+        while self.pending and self.pending[0][0] in self.results:
+            seq, context = self.pending.popleft()
+            ready.append((seq, context) + self.results.pop(seq))
+        return ready
+
+    def __len__(self):
+        return len(self.pending)
+
+
+class DetectorPool:
+    """
+    Pool of detector worker processes, each with its own cv2.dnn network.
+
+    Frames are handed to idle workers round-robin and results are released in
+    frame order through a reorder buffer. Workers are separate interpreters
+    talking over pipes, so the pool works from the eventlet web app (where the
+    pipes and threads are green) as well as from plain scripts. A worker that
+    exits is restarted by collect(), after a delay that doubles with each
+    consecutive failure.
+    """
+
+    def __init__(self, workers=2, cv_threads=1, max_in_flight=2, restart_delay=1.0, max_restart_delay=30.0):
+        self.cv_threads = cv_threads
+        self.max_in_flight = max_in_flight
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.results = queue.Queue()
+        self.reorder = ReorderBuffer()
+        self.session = 0
+        self.closed = False
+        self.next_worker = 0
+        self.workers = []
+
+        for index in range(workers):
+            worker = {"failures": 0, "restart_at": None}
+            self.workers.append(worker)
+            self._start_worker(index, worker)
+
+    def _start_worker(self, index, worker):
+        process = subprocess.Popen([sys.executable, WORKER_SCRIPT, str(self.cv_threads)], cwd=PROJECT_ROOT,
+                                   stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        worker.update({
+            "process": process,
+            "ready": False,
+            "alive": True,
+            "restart_at": None,
+            # seq -> session the frame was submitted in
+            "in_flight": {},
+            "send_queue": queue.Queue()
+        })
+        threading.Thread(target=self._send_loop, args=(worker,), daemon=True).start()
+        threading.Thread(target=self._receive_loop, args=(index, worker, process), daemon=True).start()
+
+    def new_session(self):
+        """
+        Start a new run of submissions.
+
+        Results of frames submitted before are dropped when they arrive, so a
+        run that stopped (tracking switched off, camera changed) cannot leak
+        stale detections into the next one.
+        """
+        self.session += 1
+        self.reorder = ReorderBuffer()
+
+    def submit(self, seq, frame, confidence_threshold, context=None):
+        """
+        Queue a frame on the next worker with spare capacity.
+
+        Returns False (and drops the frame) when every worker is busy. The frame
+        is serialized immediately, so its buffer can be reused right away.
+        """
+        for offset in range(len(self.workers)):
+            index = (self.next_worker + offset) % len(self.workers)
+            worker = self.workers[index]
+            if worker["ready"] and len(worker["in_flight"]) < self.max_in_flight:
+                self.next_worker = (index + 1) % len(self.workers)
+                worker["in_flight"][seq] = self.session
+                self.reorder.expect(seq, context)
+                worker["send_queue"].put(encode_message((seq, frame, confidence_threshold)))
+                return True
+        return False
+
+    def collect(self, timeout=None):
+        """
+        Return finished results in frame order as (seq, context, detections, error, timings).
+
+        With a timeout, waits up to that long for at least one result to arrive.
+        Exited workers whose restart delay has passed are started again.
+        """
+        self._restart_workers()
+        block = timeout is not None
+        while True:
+            try:
+                index, seq, detections, error, timings = self.results.get(block=block, timeout=timeout)
+            except queue.Empty:
+                break
+            block = False
+
+            worker = self.workers[index]
+            if seq == "exited":
+                # Fail everything the dead worker still owed in this session
+                worker["ready"] = False
+                worker["alive"] = False
+                worker["failures"] += 1
+                if not self.closed:
+                    delay = min(self.restart_delay * 2 ** (worker["failures"] - 1), self.max_restart_delay)
+                    worker["restart_at"] = time.time() + delay
+                for owed_seq, session in worker["in_flight"].items():
+                    if session == self.session:
+                        self.reorder.put(owed_seq, (None, "Detector worker exited", {}))
+                worker["in_flight"] = {}
+                continue
+
+            worker["failures"] = 0
+            if worker["in_flight"].pop(seq, None) == self.session:
+                self.reorder.put(seq, (detections, error, timings))
+        return self.reorder.pop_ready()
+
+    def _restart_workers(self):
+        now = time.time()
+        for index, worker in enumerate(self.workers):
+            if worker["restart_at"] is not None and now >= worker["restart_at"]:
+                worker["send_queue"].put(None)
+                self._start_worker(index, worker)
+
+    def ready_workers(self):
+        return sum(1 for worker in self.workers if worker["ready"])
+
+    def available(self):
+        """
+        True while some worker can take frames: one is ready, or is still
+        starting without having failed since its last result.
+        """
+        return any(worker["ready"] or (worker["alive"] and worker["failures"] == 0) for worker in self.workers)
+
+    def wait_ready(self, timeout=60):
+        """Wait until every worker has loaded its network; returns the number of ready workers"""
+        deadline = time.time() + timeout
+        while self.ready_workers() < len(self.workers) and time.time() < deadline:
+            time.sleep(0.1)
+        return self.ready_workers()
+
+    def pending(self):
+        return len(self.reorder)
+
+    def close(self):
+        self.closed = True
+        for worker in self.workers:
+            worker["restart_at"] = None
+            worker["send_queue"].put(None)
+        for worker in self.workers:
+            try:
+                worker["process"].wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                worker["process"].kill()
+
+    def _send_loop(self, worker):
+        stdin = worker["process"].stdin
+        send_queue = worker["send_queue"]
+        while True:
+            message = send_queue.get()
+            try:
+                if message is None:
+                    stdin.close()
+                    return
+                stdin.write(message)
+                stdin.flush()
+            except (BrokenPipeError, ValueError):
+                return
+
+    def _receive_loop(self, index, worker, process):
+        stdout = process.stdout
+        while True:
+            message = read_message(stdout)
+            if message is None:
+                # Reap the process before reporting it, so a restart never races the old one
+                process.wait()
+                self.results.put((index, "exited", None, None, {}))
+                return
+            if message[0] == "ready":
+                worker["ready"] = True
+                continue
+            seq, detections, error, timings = message
+            self.results.put((index, seq, detections, error, timings))
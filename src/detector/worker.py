@@ -0,0 +1,72 @@
+import os
+import pickle
+import struct
+import sys
+
+import cv2
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from detector.yolo import YOLODetector
+
+# Messages are pickled and prefixed with their length
+HEADER = struct.Struct('<I')
+
+
+def encode_message(message):
+    payload = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+    return HEADER.pack(len(payload)) + payload
+
+
+def read_message(stream):
+    """Read one message; returns None at end of stream"""
+    header = _read_exact(stream, HEADER.size)
+    if header is None:
+        return None
+    payload = _read_exact(stream, HEADER.unpack(header)[0])
+    if payload is None:
+        return None
+    return pickle.loads(payload)
+
+
+def _read_exact(stream, size):
+    data = b''
+    while len(data) < size:
+        chunk = stream.read(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+def main():
+    """Detector worker process: reads (seq, frame, threshold) from stdin, writes detections to stdout"""
+    cv_threads = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    cv2.setNumThreads(cv_threads)
+
+    stdin, stdout = sys.stdin.buffer, sys.stdout.buffer
+    # stdout carries results, keep any prints off it
+    sys.stdout = sys.stderr
+
+    detector = YOLODetector()
+    stdout.write(encode_message(("ready", os.getpid())))
+    stdout.flush()
+
+    while True:
+        message = read_message(stdin)
+        if message is None:
+            break
+        seq, frame, confidence_threshold = message
+        detector.confidence_threshold = confidence_threshold
+
+        try:
+            detections, error = detector.detect(frame), None
+        except Exception as e:
+            detections, error = None, str(e)
+
+        stdout.write(encode_message((seq, detections, error, detector.last_timings)))
+        stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,152 @@ import cv2
 import numpy as np
 import sys
 import os
+import time
 
 # Add project root to Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import CONFIDENCE_THRESHOLD, NMS_THRESHOLD
+from utils.profiler import profile_stage
+from config import CONFIDENCE_THRESHOLD, NMS_THRESHOLD, TILED_INFERENCE, TILE_SIZE, TILE_OVERLAP, TILE_INCLUDE_FULL_FRAME
+
+class BlobBuffer:
+    """
+    Persistent preprocessing buffers for the network input.
+
+    Produces the same blob as cv2.dnn.blobFromImage(frame, 1/255.0, size,
+    swapRB=True, crop=False) but resizes, swaps channels and scales into
+    arrays that are allocated once and reused for every frame. With batch > 1
+    each image (e.g. a tile) is written into its own slot of the batch.
+    """
+
+    def __init__(self, size=(416, 416), batch=1):
+        width, height = size
+        self.size = size
+        self.batch = batch
+        self.resized = np.empty((height, width, 3), dtype=np.uint8)
+        self.rgb = np.empty((height, width, 3), dtype=np.uint8)
+        self.blob = np.empty((batch, 3, height, width), dtype=np.float32)
+
+    def fill(self, frame, index=0):
+        cv2.resize(frame, self.size, dst=self.resized)
+        cv2.cvtColor(self.resized, cv2.COLOR_BGR2RGB, dst=self.rgb)
+        # HWC -> CHW while scaling to 0..1 straight into the blob
+        np.multiply(self.rgb.transpose(2, 0, 1), np.float32(1 / 255.0), out=self.blob[index], dtype=np.float32)
+        return self.blob
+
+def _tile_starts(length, tile_size, overlap):
+    if length <= tile_size:
+        return [0]
+    count = int(np.ceil((length - overlap) / (tile_size - overlap)))
+    # Spread the tiles evenly so the last one ends on the frame edge
+    return [round(index * (length - tile_size) / (count - 1)) for index in range(count)]
+
+def tile_grid(width, height, tile_size, overlap):
+    """
+    Split a frame into overlapping tiles of about tile_size pixels.
+
+    Returns a list of (x, y, w, h) rectangles covering the whole frame; adjacent
+    tiles overlap by at least overlap pixels. Frames no larger than a tile give
+    a single tile.
+    """
+    tile_w, tile_h = min(tile_size, width), min(tile_size, height)
+    return [(x, y, tile_w, tile_h)
+            for y in _tile_starts(height, tile_size, overlap)
+            for x in _tile_starts(width, tile_size, overlap)]
+
+def _coverage(box, others):
+    """Fraction of box's area (x1, y1, x2, y2) that lies inside each of the other boxes"""
+    width = np.minimum(box[2], others[:, 2]) - np.maximum(box[0], others[:, 0])
+    height = np.minimum(box[3], others[:, 3]) - np.maximum(box[1], others[:, 1])
+    area = max(1, (box[2] - box[0]) * (box[3] - box[1]))
+    return np.clip(width, 0, None) * np.clip(height, 0, None) / area
+
+def merge_tile_detections(tiles, tile_boxes, tile_confidences, width, height,
+                          edge_margin=4, covered=0.5, same_person=0.3):
+    """
+    Resolve boxes cut off by interior tile borders before cross-tile NMS.
+
+    A box within edge_margin pixels of a tile border that is not also a frame
+    border shows only part of a person. It is dropped when a complete box (from
+    a neighbouring tile whose overlap holds the whole person, or from the full
+    frame) covers at least `covered` of it. The partial boxes that remain are
+    merged with partial boxes of other tiles covering at least `same_person` of
+    the smaller one, so a person larger than the overlap becomes one union box.
+
+    Parameters:
+        tiles: The (x, y, w, h) rectangles the boxes were detected in.
+        tile_boxes: Per tile, an (N, 4) int array of x, y, w, h in frame coordinates.
+        tile_confidences: Per tile, the N confidences.
+        width: Frame width in pixels.
+        height: Frame height in pixels.
+
+    Returns (boxes, confidences) with boxes as an (N, 4) int array of x, y, w, h.
+    """
+    complete_boxes, complete_confidences, partial = [], [], []
+    for index, ((x, y, w, h), boxes, confidences) in enumerate(zip(tiles, tile_boxes, tile_confidences)):
+        cut = np.zeros(len(boxes), dtype=bool)
+        if x > 0:
+            cut |= boxes[:, 0] <= x + edge_margin
+        if y > 0:
+            cut |= boxes[:, 1] <= y + edge_margin
+        if x + w < width:
+            cut |= boxes[:, 0] + boxes[:, 2] >= x + w - edge_margin
+        if y + h < height:
+            cut |= boxes[:, 1] + boxes[:, 3] >= y + h - edge_margin
+        complete_boxes.append(boxes[~cut])
+        complete_confidences.append(confidences[~cut])
+        partial.extend((confidence, index, box) for box, confidence in zip(boxes[cut], confidences[cut]))
+
+    boxes = np.concatenate(complete_boxes).reshape(-1, 4) if complete_boxes else np.empty((0, 4), np.int32)
+    confidences = np.concatenate(complete_confidences) if complete_confidences else np.empty(0, np.float32)
+    if not partial:
+        return boxes, confidences
+
+    # Corner coordinates make the overlap tests below simple
+    corners = np.column_stack([boxes[:, :2], boxes[:, :2] + boxes[:, 2:]])
+    groups = []  # [corners, confidence, tile indices]
+    for confidence, index, box in sorted(partial, key=lambda item: -item[0]):
+        box = np.array([box[0], box[1], box[0] + box[2], box[1] + box[3]])
+        if len(corners) and _coverage(box, corners).max() >= covered:
+            continue
+        for group in groups:
+            if index in group[2]:
+                continue
+            # Intersection over the smaller of the two boxes
+            overlap = max(_coverage(box, group[0][None])[0], _coverage(group[0], box[None])[0])
+            if overlap >= same_person:
+                group[0] = np.concatenate([np.minimum(group[0][:2], box[:2]), np.maximum(group[0][2:], box[2:])])
+                group[2].add(index)
+                break
+        else:
+            groups.append([box, confidence, {index}])
+
+    if groups:
+        merged = np.array([np.concatenate([group[0][:2], group[0][2:] - group[0][:2]]) for group in groups])
+        boxes = np.concatenate([boxes, merged.astype(boxes.dtype)])
+        confidences = np.concatenate([confidences, np.array([group[1] for group in groups], confidences.dtype)])
+    return boxes, confidences
+
+def decode_person_detections(outs, width, height, confidence_threshold):
+    """
+    Convert raw YOLO outputs into person boxes and confidences with array operations.
+
+    Returns (boxes, confidences) where boxes is an (N, 4) int array of x, y, w, h.
+    """
+    out = outs[0] if len(outs) == 1 else np.concatenate(outs)
+
+    # Keep rows whose best class is person (class 0) with enough confidence
+    person_scores = out[:, 5]
+    candidates = out[person_scores > confidence_threshold]
+    candidates = candidates[candidates[:, 5] >= candidates[:, 5:].max(axis=1)]
+
+    center_x = (candidates[:, 0] * width).astype(np.int32)
+    center_y = (candidates[:, 1] * height).astype(np.int32)
+    w = (candidates[:, 2] * width).astype(np.int32)
+    h = (candidates[:, 3] * height).astype(np.int32)
+
+    # Rectangle coordinates
+    boxes = np.stack([(center_x - w / 2).astype(np.int32), (center_y - h / 2).astype(np.int32), w, h], axis=1)
+    return boxes, candidates[:, 5]
 
 class YOLODetector:
     def __init__(self):
@@ -31,52 +173,110 @@ class YOLODetector:
         # Add configurable confidence threshold for sensitivity adjustment
         self.confidence_threshold = CONFIDENCE_THRESHOLD
         self.nms_threshold = NMS_THRESHOLD
+
+        # Network input is written into the same buffers for every frame
+        self.blob_buffer = BlobBuffer((416, 416))
+
+        # Tiled mode runs overlapping tiles of high-resolution frames as one batch
+        self.tiled = TILED_INFERENCE
+        self.tile_size = TILE_SIZE
+        self.tile_overlap = TILE_OVERLAP
+        self.tile_full_frame = TILE_INCLUDE_FULL_FRAME
+        self.tile_buffer = None
+
+        # Timings of the last detect() call in milliseconds
+        self.last_timings = {}
         
+    @profile_stage("inference")
     def detect(self, frame):
+        if self.tiled:
+            return self.detect_tiled(frame)
+
+        start = time.perf_counter()
         height, width = frame.shape[:2]
         
         # Create blob from image
-        blob = cv2.dnn.blobFromImage(frame, 1/255.0, (416, 416), swapRB=True, crop=False)
+        blob = self.blob_buffer.fill(frame)
         
         # Detect objects
         self.net.setInput(blob)
         outs = self.net.forward(self.output_layers)
         
-        # Information to display on screen
-        boxes = []
-        confidences = []
-        class_ids = []
-        
-        # Showing information on the screen
-        for out in outs:
-            for detection in out:
-                scores = detection[5:]
-                class_id = np.argmax(scores)
-                confidence = scores[class_id]
-                
-                # Use the instance's confidence threshold instead of the global constant
-                if confidence > self.confidence_threshold and class_id == 0:  # 0 is person class
-                    # Object detected
-                    center_x = int(detection[0] * width)
-                    center_y = int(detection[1] * height)
-                    w = int(detection[2] * width)
-                    h = int(detection[3] * height)
-                    
-                    # Rectangle coordinates
-                    x = int(center_x - w / 2)
-                    y = int(center_y - h / 2)
-                    
-                    boxes.append([x, y, w, h])
-                    confidences.append(float(confidence))
-                    class_ids.append(class_id)
+        # Use the instance's confidence threshold instead of the global constant
+        boxes, confidences = decode_person_detections(outs, width, height, self.confidence_threshold)
+        detections = self._suppress(boxes, confidences)
+
+        total_ms = (time.perf_counter() - start) * 1000
+        self.last_timings = {"tiles": 1, "tile_avg_ms": round(total_ms, 2), "total_ms": round(total_ms, 2)}
+        return detections
+
+    def detect_tiled(self, frame):
+        """
+        Detect people in overlapping tiles of the frame with one batched forward pass.
+
+        Each tile is seen by the network at close to its native resolution, so
+        distant people stay large enough to detect. Boxes from all tiles (and
+        the downscaled full frame, which catches people larger than a tile) are
+        merged with a single non-maximum suppression across tiles, after boxes
+        cut off by interior tile borders are dropped or joined (see
+        merge_tile_detections).
+
+        The tiles share one forward pass, so last_timings has no per-tile
+        latency; tile_avg_ms is total_ms divided by the number of tiles.
+        """
+        start = time.perf_counter()
+        height, width = frame.shape[:2]
+        tiles = tile_grid(width, height, self.tile_size, self.tile_overlap)
+        if self.tile_full_frame and len(tiles) > 1:
+            tiles.append((0, 0, width, height))
+
+        if self.tile_buffer is None or self.tile_buffer.batch != len(tiles):
+            self.tile_buffer = BlobBuffer(self.blob_buffer.size, batch=len(tiles))
+        for index, (x, y, w, h) in enumerate(tiles):
+            self.tile_buffer.fill(frame[y:y + h, x:x + w], index)
+        prepared = time.perf_counter()
+
+        self.net.setInput(self.tile_buffer.blob)
+        outs = self.net.forward(self.output_layers)
+        inferred = time.perf_counter()
+
+        # Batched outputs are (tiles, rows, 85); a batch of one comes back as (rows, 85)
+        outs = [out.reshape(len(tiles), -1, out.shape[-1]) for out in outs]
+        all_boxes, all_confidences = [], []
+        for index, (x, y, w, h) in enumerate(tiles):
+            boxes, confidences = decode_person_detections([out[index] for out in outs], w, h,
+                                                          self.confidence_threshold)
+            # Tile coordinates -> frame coordinates
+            boxes[:, 0] += x
+            boxes[:, 1] += y
+            all_boxes.append(boxes)
+            all_confidences.append(confidences)
+
+        # People cut by interior tile borders would otherwise survive NMS as several partial boxes
+        boxes, confidences = merge_tile_detections(tiles, all_boxes, all_confidences, width, height)
+        detections = self._suppress(boxes, confidences)
+        finished = time.perf_counter()
+
+        total_ms = (finished - start) * 1000
+        self.last_timings = {
+            "tiles": len(tiles),
+            "tile_avg_ms": round(total_ms / len(tiles), 2),
+            "preprocess_ms": round((prepared - start) * 1000, 2),
+            "forward_ms": round((inferred - prepared) * 1000, 2),
+            "merge_ms": round((finished - inferred) * 1000, 2),
+            "total_ms": round(total_ms, 2)
+        }
+        return detections
+
+    def _suppress(self, boxes, confidences):
+        if len(boxes) == 0:
+            return []
         
         # Apply non-maximum suppression with instance threshold
-        indexes = cv2.dnn.NMSBoxes(boxes, confidences, self.confidence_threshold, self.nms_threshold)
+        indexes = cv2.dnn.NMSBoxes(boxes.tolist(), confidences.tolist(), self.confidence_threshold, self.nms_threshold)
         
         detections = []
         if len(indexes) > 0:
-            indexes = indexes.flatten()
-            for i in indexes:
-                detections.append(boxes[i])
+            detections = boxes[np.asarray(indexes).flatten()].tolist()
         
-        return detections
\ No newline at end of file
+        return detections
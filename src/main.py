@@ -6,11 +6,14 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import the Flask app from web_app.py (with proper import path)
-from src.web_app import app, socketio
+from src.web_app import app, socketio, start
 
 def main():
     print("Starting Person Counter web server...")
     print("Access the application at http://localhost:5000")
+    # With debug the reloader runs the server in a child process; only that one may drive the camera
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start()
     # Run the Flask web server with Socket.IO
     socketio.run(app, debug=True, host='0.0.0.0', port=5000)
 
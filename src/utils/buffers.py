@@ -0,0 +1,23 @@
+class FrameBufferPool:
+    """
+    Small ring of reusable frame arrays for capture.
+
+    Readers that accept an output array (cv2.VideoCapture.read(image)) write
+    into the next buffer instead of allocating a new frame every time. A frame
+    stays valid until the pool has cycled through all of its buffers, so the
+    pool must be larger than the number of frames held at once.
+    """
+
+    def __init__(self, count=3):
+        self.buffers = [None] * count
+        self.index = 0
+
+    def read(self, reader):
+        """Call reader(buffer) -> (success, frame) with the next reusable buffer"""
+        slot = self.index
+        success, frame = reader(self.buffers[slot])
+        if success and frame is not None:
+            # Keep whatever array the reader produced (it reallocates on size changes)
+            self.buffers[slot] = frame
+            self.index = (slot + 1) % len(self.buffers)
+        return success, frame
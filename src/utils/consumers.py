@@ -0,0 +1,82 @@
+import threading
+import time
+
+
+class ConsumerTracker:
+    """
+    Tracks who needs the output of the capture pipeline and hands out encoded frames.
+
+    Stream viewers register for as long as they are connected; one-off
+    consumers take a short lease instead. The pipeline waits here while there
+    is no demand, and viewers wait here for the next encoded frame, so neither
+    polls.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.viewers = 0
+        self.leases = {}
+        self.frame = None
+        self.frame_seq = 0
+        self.frame_time = 0.0
+        self.frame_size = None
+
+    def add_viewer(self):
+        with self.condition:
+            self.viewers += 1
+            self.condition.notify_all()
+
+    def remove_viewer(self):
+        with self.condition:
+            self.viewers -= 1
+
+    def lease(self, name, seconds):
+        """Ask for pipeline output for the next few seconds"""
+        with self.condition:
+            self.leases[name] = time.time() + seconds
+            self.condition.notify_all()
+
+    def has_lease(self, now=None):
+        now = time.time() if now is None else now
+        with self.condition:
+            for name, expiry in list(self.leases.items()):
+                if expiry <= now:
+                    del self.leases[name]
+            return bool(self.leases)
+
+    def wake(self):
+        """Wake the pipeline after a change that may create demand"""
+        with self.condition:
+            self.condition.notify_all()
+
+    def wait_for_demand(self, timeout):
+        with self.condition:
+            self.condition.wait(timeout)
+
+    def publish_frame(self, frame, seq, timestamp, size=None):
+        with self.condition:
+            self.frame = frame
+            self.frame_seq = seq
+            self.frame_time = timestamp
+            self.frame_size = size
+            self.condition.notify_all()
+
+    def latest(self):
+        """Return (frame, seq, timestamp, size) of the newest encoded frame"""
+        with self.condition:
+            return self.frame, self.frame_seq, self.frame_time, self.frame_size
+
+    def wait_for_frame(self, after_seq, timeout):
+        """
+        Wait for an encoded frame newer than after_seq.
+
+        Returns (frame, seq, timestamp); frame is None if nothing new arrived in time.
+        """
+        deadline = time.time() + timeout
+        with self.condition:
+            while self.frame is None or self.frame_seq == after_seq:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return None, after_seq, 0.0
+                self.condition.wait(remaining)
+            return self.frame, self.frame_seq, self.frame_time
@@ -0,0 +1,10 @@
+import os
+
+# ETags start with a per-process prefix so they do not survive a restart, when
+# counters such as versions and frame sequence numbers begin again at 1
+PROCESS_PREFIX = os.urandom(4).hex()
+
+
+def make_etag(*parts):
+    """An ETag for this process made from the given parts, e.g. a version number"""
+    return "-".join(str(part) for part in (PROCESS_PREFIX, *parts))
@@ -0,0 +1,169 @@
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+
+class RateLimiter:
+    """
+    Allow an action at most once per interval for each key.
+
+    A caller that is refused can defer() the value it wanted to send; flush()
+    hands back the latest deferred value per key once the key's interval has
+    expired, so the final state of a burst is never lost.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.last_allowed = {}
+        self.pending = {}
+
+    def allow(self, key, now=None):
+        now = time.time() if now is None else now
+        last = self.last_allowed.get(key)
+        if last is not None and now - last < self.interval:
+            return False
+        self.last_allowed[key] = now
+        # Whatever is sent now supersedes a deferred value
+        self.pending.pop(key, None)
+        return True
+
+    def defer(self, key, value=None):
+        """Remember the latest value refused for key until flush() can send it"""
+        self.pending[key] = value
+
+    def cancel(self, key):
+        """Forget a deferred value that no longer needs sending"""
+        self.pending.pop(key, None)
+
+    def flush(self, now=None):
+        """Return (key, value) pairs of deferred values whose interval has expired"""
+        now = time.time() if now is None else now
+        due = []
+        for key, value in list(self.pending.items()):
+            if self.allow(key, now):
+                due.append((key, value))
+        return due
+
+
+class EventRegistry:
+    """
+    Registry of system events (errors and warnings) keyed by event ID.
+
+    Each event keeps an occurrence count and first/last seen times. Repeated
+    occurrences only update the record. Clients are notified through
+    notify(event) when an event is raised or resolved, at most once per emit
+    interval per event so a flapping condition cannot flood them; a transition
+    held back by that limit is sent by the next flush() after the interval.
+    """
+
+    def __init__(self, history_size=500, emit_interval=5.0, notify=None):
+        self.events = {}
+        self.history = deque(maxlen=history_size)
+        self.limiter = RateLimiter(emit_interval)
+        self.notify = notify or (lambda event: None)
+        # Event ID -> active state clients were last told about
+        self.notified = {}
+        self.lock = threading.Lock()
+
+    def raise_event(self, event_id, message, details):
+        """
+        Record an occurrence of an event.
+
+        Returns the public event record if the event just became active and
+        clients were notified, otherwise None.
+        """
+        now = time.time()
+        with self.lock:
+            event = self.events.get(event_id)
+            if event is None:
+                event = {
+                    "id": event_id,
+                    "message": message,
+                    "details": details,
+                    "count": 0,
+                    "first_seen": now,
+                    "last_seen": now,
+                    "active": False
+                }
+                self.events[event_id] = event
+
+            event["count"] += 1
+            event["last_seen"] = now
+            event["message"] = message
+            event["details"] = details
+
+            if event["active"]:
+                return None
+
+            event["active"] = True
+            self.history.append({"id": event_id, "state": "raised", "message": message, "time": now})
+            record = self._transition(event, now)
+        if record:
+            self.notify(record)
+        return record
+
+    def resolve(self, event_id):
+        """Mark an event as resolved; returns True if it was active"""
+        now = time.time()
+        with self.lock:
+            event = self.events.get(event_id)
+            if event is None or not event["active"]:
+                return False
+            event["active"] = False
+            self.history.append({"id": event_id, "state": "resolved", "message": event["message"], "time": now})
+            record = self._transition(event, now)
+        if record:
+            self.notify(record)
+        return True
+
+    def flush(self, now=None):
+        """Notify clients of transitions held back by the emit interval once it has expired"""
+        now = time.time() if now is None else now
+        records = []
+        with self.lock:
+            for event_id, _ in self.limiter.flush(now):
+                event = self.events[event_id]
+                # Skip events that flapped back to the state clients already know
+                if self.notified.get(event_id) != event["active"]:
+                    self.notified[event_id] = event["active"]
+                    records.append(self._public(event))
+        for record in records:
+            self.notify(record)
+
+    def _transition(self, event, now):
+        """Return the record to notify clients with now, or defer it; called with the lock held"""
+        event_id = event["id"]
+        if not self.limiter.allow(event_id, now):
+            self.limiter.defer(event_id)
+            return None
+        if self.notified.get(event_id, False) == event["active"]:
+            return None
+        self.notified[event_id] = event["active"]
+        return self._public(event)
+
+    def clear(self):
+        """Resolve all active events"""
+        with self.lock:
+            active_ids = [event_id for event_id, event in self.events.items() if event["active"]]
+        for event_id in active_ids:
+            self.resolve(event_id)
+
+    def active_events(self):
+        """Return the active events, oldest first"""
+        with self.lock:
+            active = [self._public(event) for event in self.events.values() if event["active"]]
+        active.sort(key=lambda event: event["first_seen"])
+        return active
+
+    def recent_history(self):
+        """Return the bounded history of raise/resolve transitions"""
+        with self.lock:
+            return [dict(entry, timestamp=datetime.fromtimestamp(entry["time"]).isoformat())
+                    for entry in self.history]
+
+    @staticmethod
+    def _public(event):
+        record = dict(event)
+        record["timestamp"] = datetime.fromtimestamp(event["first_seen"]).isoformat()
+        return record
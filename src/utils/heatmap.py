@@ -0,0 +1,137 @@
+import math
+import time
+from collections import OrderedDict, deque
+
+import cv2
+import numpy as np
+
+# Sample weights grow as exp(decay_rate * age); renormalize past ~1e6
+MAX_GROWTH_EXPONENT = math.log(1e6)
+
+
+class OccupancyHeatmap:
+    """
+    Time-decayed occupancy grid built from detection footprints.
+
+    Each detection adds the time it represents (person-seconds) to the grid
+    cell under its foot point (bottom centre of the box) with a vectorized
+    scatter-add, so an update costs the same however long the heatmap has
+    been running. Decay is applied lazily: new samples are weighted up
+    instead of scaling the whole grid down every frame, and the grid is
+    renormalized only when the weights grow large. A separate undecayed grid
+    collects each hour (snapshot_interval) and is kept as a snapshot.
+    """
+
+    def __init__(self, grid_size=(64, 48), half_life=3600.0, snapshot_interval=3600,
+                 max_snapshots=168, render_interval=5.0):
+        self.cols, self.rows = grid_size
+        self.decay_rate = math.log(2) / half_life
+        self.snapshot_interval = snapshot_interval
+        self.render_interval = render_interval
+
+        self.grid = np.zeros(self.rows * self.cols, dtype=np.float64)
+        self.reference_time = None
+        self.last_update = None
+
+        self.period_grid = np.zeros(self.rows * self.cols, dtype=np.float64)
+        self.period_start = None
+        self.snapshots = deque(maxlen=max_snapshots)
+
+        self.render_cache = OrderedDict()
+
+    def add(self, detections, frame_shape, timestamp=None):
+        """Accumulate the foot points of one frame's [x, y, w, h] detections"""
+        timestamp = time.time() if timestamp is None else timestamp
+        self._roll_period(timestamp)
+
+        # Each frame stands for the time since the previous one (capped for gaps)
+        elapsed = 0.0 if self.last_update is None else min(max(timestamp - self.last_update, 0.0), 1.0)
+        self.last_update = timestamp
+        if not detections or elapsed == 0.0:
+            return
+
+        height, width = frame_shape[:2]
+        boxes = np.asarray(detections, dtype=np.float64).reshape(-1, 4)
+        # Foot points in grid cells (np.minimum/np.maximum are much cheaper than np.clip on tiny arrays)
+        cols = ((boxes[:, 0] + boxes[:, 2] / 2) * (self.cols / width)).astype(np.intp)
+        rows = ((boxes[:, 1] + boxes[:, 3]) * (self.rows / height)).astype(np.intp)
+        cells = np.minimum(np.maximum(rows, 0), self.rows - 1) * self.cols + \
+            np.minimum(np.maximum(cols, 0), self.cols - 1)
+
+        if self.reference_time is None:
+            self.reference_time = timestamp
+        exponent = self.decay_rate * (timestamp - self.reference_time)
+        if exponent > MAX_GROWTH_EXPONENT:
+            # Fold the accumulated weight back into the grid before it overflows
+            self.grid *= math.exp(-exponent)
+            self.reference_time = timestamp
+            exponent = 0.0
+
+        np.add.at(self.grid, cells, elapsed * math.exp(exponent))
+        np.add.at(self.period_grid, cells, elapsed)
+
+    def current(self, now=None):
+        """The decayed grid as a rows x cols array of person-seconds"""
+        now = time.time() if now is None else now
+        if self.reference_time is None:
+            return np.zeros((self.rows, self.cols))
+        return (self.grid * math.exp(-self.decay_rate * (now - self.reference_time))).reshape(self.rows, self.cols)
+
+    def snapshot_times(self):
+        return [start for start, _ in self.snapshots]
+
+    def snapshot(self, start):
+        """The undecayed grid of the period starting at start, or None"""
+        for period_start, grid in self.snapshots:
+            if period_start == start:
+                return grid
+        return None
+
+    def _roll_period(self, timestamp):
+        period_start = int(timestamp // self.snapshot_interval) * self.snapshot_interval
+        if self.period_start is None:
+            self.period_start = period_start
+        elif period_start != self.period_start:
+            self.snapshots.append((self.period_start, self.period_grid.reshape(self.rows, self.cols).copy()))
+            self.period_grid[:] = 0
+            self.period_start = period_start
+
+    def render_png(self, size, start=None, now=None):
+        """
+        Render the live grid (or the snapshot starting at start) as a PNG overlay.
+
+        The image is colorized with transparency following the intensity so it
+        can be laid over a camera frame of the given (width, height). Renders are
+        cached: snapshots never change, and the live grid is re-rendered at most
+        every render_interval seconds.
+        """
+        now = time.time() if now is None else now
+        if start is None:
+            key = ("live", size)
+            cached = self.render_cache.get(key)
+            if cached and now - cached[0] < self.render_interval:
+                return cached[1]
+            grid = self.current(now)
+        else:
+            key = (start, size)
+            cached = self.render_cache.get(key)
+            if cached:
+                return cached[1]
+            grid = self.snapshot(start)
+            if grid is None:
+                return None
+
+        peak = grid.max()
+        scaled = np.zeros(grid.shape, dtype=np.uint8) if peak <= 0 else \
+            np.sqrt(grid / peak) * 255  # square root keeps quieter areas visible
+        intensity = cv2.resize(scaled.astype(np.uint8), size, interpolation=cv2.INTER_LINEAR)
+        image = cv2.cvtColor(cv2.applyColorMap(intensity, cv2.COLORMAP_JET), cv2.COLOR_BGR2BGRA)
+        image[:, :, 3] = np.minimum(intensity.astype(np.uint16) * 3 // 2, 200)
+        _, png = cv2.imencode('.png', image)
+        data = png.tobytes()
+
+        self.render_cache[key] = (now, data)
+        self.render_cache.move_to_end(key)
+        while len(self.render_cache) > 16:
+            self.render_cache.popitem(last=False)
+        return data
@@ -0,0 +1,242 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import sys
+import time
+from datetime import datetime
+
+import cv2
+
+from utils.threads import threading, queue
+
+# Attributes every LogRecord has; anything else came in through extra={...}
+STANDARD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+OPENCV_LOG_LEVELS = {"SILENT": 0, "FATAL": 1, "ERROR": 2, "WARNING": 3, "INFO": 4, "DEBUG": 5, "VERBOSE": 6}
+
+
+class StructuredFormatter(logging.Formatter):
+    """
+    Formats records as "time level logger: message key=value ..." or as JSON lines.
+
+    Fields passed with extra={...} are kept as structured fields instead of
+    being baked into the message text.
+    """
+
+    def __init__(self, json_lines=False):
+        super().__init__()
+        self.json_lines = json_lines
+
+    def format(self, record):
+        fields = {key: value for key, value in vars(record).items() if key not in STANDARD_ATTRIBUTES}
+        timestamp = datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds")
+        message = record.getMessage()
+
+        if self.json_lines:
+            entry = {"time": timestamp, "level": record.levelname, "logger": record.name, "message": message}
+            entry.update(fields)
+            if record.exc_text:
+                entry["exception"] = record.exc_text
+            return json.dumps(entry, default=str)
+
+        line = f"{timestamp} {record.levelname:<7} {record.name}: {message}"
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_text:
+            line += "\n" + record.exc_text
+        return line
+
+
+class StderrHandler(logging.StreamHandler):
+    """Stream handler writing to the current sys.stderr, which may be replaced after setup"""
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+
+    @property
+    def stream(self):
+        return sys.stderr
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Let through at most `burst` records per `interval` seconds for each message.
+
+    Records are grouped by logger, level and message template (the format
+    string, before arguments are applied), so a flapping condition logging the
+    same line every frame costs one dictionary lookup per call. The first
+    record after a suppressed stretch carries a `suppressed` count; if the
+    message does not come back, expire() turns the count into a record of its
+    own once the window has run out.
+    """
+
+    def __init__(self, interval=10.0, burst=5):
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        self.windows = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        if self.interval <= 0:
+            return True
+        key = (record.name, record.levelno, record.msg)
+        now = record.created
+        with self.lock:
+            window = self.windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window else 0
+                self.windows[key] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                return True
+            if window[1] < self.burst:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+    def expire(self, now=None):
+        """
+        Drop the windows that have run out (all of them if now is None).
+
+        Returns a record for each dropped window that suppressed records,
+        carrying the message template and the `suppressed` count.
+        """
+        with self.lock:
+            expired = [key for key, window in self.windows.items()
+                       if now is None or now - window[0] >= self.interval]
+            counts = [(key, self.windows.pop(key)[2]) for key in expired]
+
+        records = []
+        for (name, levelno, msg), suppressed in counts:
+            if suppressed:
+                record = logging.LogRecord(name, levelno, "", 0, str(msg), None, None)
+                record.suppressed = suppressed
+                records.append(record)
+        return records
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that never blocks or formats on the caller's thread.
+
+    Message formatting happens on the listener thread. When the bounded queue
+    is full, records are dropped and counted instead of stalling the caller.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Only tracebacks must be rendered now, while the exception is still current
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class NativeQueueListener(logging.handlers.QueueListener):
+    """
+    QueueListener whose worker is a real OS thread, also under eventlet.
+
+    With a rate_limit filter it also writes the suppressed counts of expired
+    windows, checking at least once per rate limit interval, and all pending
+    counts when it stops.
+    """
+
+    def __init__(self, log_queue, *handlers, respect_handler_level=False, rate_limit=None):
+        super().__init__(log_queue, *handlers, respect_handler_level=respect_handler_level)
+        self.rate_limit = rate_limit
+
+    def start(self):
+        self._thread = threading.Thread(target=self._monitor, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def enqueue_sentinel(self):
+        # The writer keeps draining the queue, so waiting for room is safe
+        self.queue.put(self._sentinel)
+
+    def _monitor(self):
+        timeout = self.rate_limit.interval if self.rate_limit and self.rate_limit.interval > 0 else None
+        next_expiry = time.time() + timeout if timeout else None
+        while True:
+            try:
+                record = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                record = None
+            if record is self._sentinel:
+                break
+            if record is not None:
+                self.handle(record)
+            if timeout and time.time() >= next_expiry:
+                for summary in self.rate_limit.expire(time.time()):
+                    self.handle(summary)
+                next_expiry = time.time() + timeout
+
+        if self.rate_limit:
+            for summary in self.rate_limit.expire():
+                self.handle(summary)
+
+
+def _set_level(logger, level):
+    """Set a logger's level by name or number; unknown levels fall back to INFO"""
+    try:
+        logger.setLevel(level.upper() if isinstance(level, str) else level)
+    except (TypeError, ValueError):
+        logger.setLevel(logging.INFO)
+        logging.getLogger(__name__).warning("Unknown log level %r for logger '%s', using INFO",
+                                            level, logger.name)
+
+
+listener = None
+
+
+def setup_logging(level="INFO", levels=None, json_lines=False, log_file=None, queue_size=10000,
+                  rate_limit_interval=10.0, rate_limit_burst=5, opencv_level="ERROR"):
+    """
+    Route all logging through a bounded queue to a background writer thread.
+
+    Log calls on the capture and inference path only filter and enqueue; the
+    writer thread formats the records and writes them to stderr (and log_file
+    if set). `levels` maps logger names to their own levels; unknown level
+    names log a warning and use INFO. OpenCV's native log output is limited to
+    opencv_level.
+    """
+    global listener
+    if listener is not None:
+        return listener
+
+    formatter = StructuredFormatter(json_lines)
+    handlers = [StderrHandler()]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    rate_limit = RateLimitFilter(rate_limit_interval, rate_limit_burst)
+    queue_handler.addFilter(rate_limit)
+
+    listener = NativeQueueListener(log_queue, *handlers, respect_handler_level=True, rate_limit=rate_limit)
+    listener.start()
+    # Write what is still queued (and the pending suppressed counts) at exit
+    atexit.register(listener.stop)
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    _set_level(root, level)
+    for name, logger_level in (levels or {}).items():
+        _set_level(logging.getLogger(name), logger_level)
+
+    cv2.setLogLevel(OPENCV_LOG_LEVELS.get(opencv_level, 2))
+    return listener
@@ -0,0 +1,31 @@
+def build_frame_metadata(seq, timestamp, frame_shape, detections, track_ids, count, fps):
+    """
+    Build the compact detection metadata published alongside each frame.
+
+    Boxes are flattened into a single list of x, y, w, h values so the payload
+    stays small; entry i of "ids" is the track ID of the i-th box.
+
+    Parameters:
+        seq: Sequence number of the frame the detections belong to.
+        timestamp: Capture time of the frame (seconds since the epoch).
+        frame_shape: Shape of the frame, used by clients to scale the boxes.
+        detections: A list of [x, y, w, h] boxes.
+        track_ids: A list of track IDs matching the detections.
+        count: The person count for the frame.
+        fps: The current processing frame rate.
+    """
+    height, width = frame_shape[:2]
+    boxes = []
+    for box in detections:
+        boxes.extend(int(value) for value in box)
+
+    return {
+        "seq": seq,
+        "ts": round(timestamp, 3),
+        "w": width,
+        "h": height,
+        "count": count,
+        "fps": round(fps, 1),
+        "boxes": boxes,
+        "ids": [int(track_id) for track_id in track_ids]
+    }
@@ -0,0 +1,157 @@
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import sys
+import time
+from collections import Counter
+
+from utils.threads import threading
+
+# Code objects of tagged functions -> pipeline stage name
+STAGE_CODES = {}
+
+# Innermost frames of threads parked in a blocking call (queue.get, Condition.wait,
+# join, a detector worker pipe read) as (file name, function name)
+PARKED_FRAMES = {("threading.py", "wait"), ("threading.py", "_wait_for_tstate_lock"),
+                 ("worker.py", "_read_exact")}
+
+
+def profile_stage(stage):
+    """
+    Tag a function as a pipeline stage for the profilers.
+
+    Only the function's code object is registered; the function itself is
+    returned unchanged, so tagging costs nothing when no profile is running.
+    """
+    def decorator(func):
+        STAGE_CODES[func.__code__] = stage
+        return func
+    return decorator
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler that samples the stacks of all threads from a background thread.
+
+    Each sample walks the current frame of every thread with sys._current_frames(),
+    so the profiled code runs untouched. Under eventlet the main thread's stack
+    is the greenlet that is running at that moment (or the hub while idle).
+    Threads parked in a blocking call (the log and clip writers waiting on
+    their queues, detector pool threads waiting on a worker) are counted in
+    `parked` instead of being sampled, so they do not crowd out the threads
+    doing work. Stacks are aggregated into collapsed form
+    ("thread;outer;inner count"), which flamegraph.pl, speedscope and similar
+    tools read directly.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.parked = 0
+
+    def run(self, seconds):
+        """Sample for the given number of seconds on a background thread; returns the thread"""
+        sampler = threading.Thread(target=self._sample_loop, args=(seconds,), name="profiler", daemon=True)
+        sampler.start()
+        return sampler
+
+    def _sample_loop(self, seconds):
+        own_ident = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                if (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in PARKED_FRAMES:
+                    self.parked += 1
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(_frame_label(code))
+                    stage = STAGE_CODES.get(code)
+                    if stage:
+                        stack.append(f"[{stage}]")
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+            time.sleep(self.interval)
+
+    def collapsed(self):
+        """Collapsed stacks, one "frame;frame;frame count" line per unique stack"""
+        lines = [f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common()]
+        return "\n".join(lines) + "\n"
+
+    def stage_summary(self):
+        """Share of samples per pipeline stage, keyed by the innermost tagged stage"""
+        stages = Counter()
+        total = sum(self.stacks.values())
+        for stack, count in self.stacks.items():
+            tags = [frame for frame in stack if frame.startswith("[")]
+            stages[tags[-1][1:-1] if tags else "untagged"] += count
+        return {stage: {"samples": count, "percent": round(100 * count / total, 1)}
+                for stage, count in stages.most_common()} if total else {}
+
+    def top(self, limit=20):
+        """Functions by samples spent in them (self) and anywhere below them (total)"""
+        own, inclusive = Counter(), Counter()
+        total = sum(self.stacks.values())
+        for stack, count in self.stacks.items():
+            frames = [frame for frame in stack[1:] if not frame.startswith("[")]
+            if frames:
+                own[frames[-1]] += count
+            for frame in set(frames):
+                inclusive[frame] += count
+        return [{"function": frame,
+                 "self": own[frame],
+                 "self_percent": round(100 * own[frame] / total, 1),
+                 "total": count,
+                 "total_percent": round(100 * count / total, 1)}
+                for frame, count in inclusive.most_common(limit)] if total else []
+
+
+class PipelineProfile:
+    """
+    Deterministic cProfile of the frame pipeline.
+
+    The pipeline calls enable()/disable() around each frame while a profile is
+    active, and nothing is hooked while no profile is running. cProfile follows
+    the OS thread, not the greenlet: whenever the frame yields to the eventlet
+    hub (capture pacing, sleeps, socket writes), the hub's wait and every
+    greenlet it runs meanwhile are profiled too. Cumulative times of the frame
+    stages therefore include hub wait (e.g. epolls do_poll) and other requests;
+    use the sampling profiler for where the pipeline itself spends its time.
+    """
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.frames = 0
+
+    def enable(self):
+        self.profile.enable()
+
+    def disable(self):
+        self.profile.disable()
+        self.frames += 1
+
+    def top(self, limit=20, sort="cumulative"):
+        """Top functions as pstats text; empty if no frame was profiled"""
+        if not self.frames:
+            return ""
+        output = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=output)
+        stats.sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+    def dump(self):
+        """The raw pstats data, loadable with pstats or snakeviz"""
+        return marshal.dumps(pstats.Stats(self.profile).stats)
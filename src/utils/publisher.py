@@ -0,0 +1,64 @@
+import json
+import threading
+import time
+from datetime import datetime
+
+from utils.etags import make_etag
+
+
+class CountPublisher:
+    """
+    Holds the current occupancy as a ready-to-send JSON snapshot.
+
+    The snapshot is serialized once per change together with its version and
+    ETag, so HTTP clients (plain polling, long-polling and server-sent events)
+    only ever read precomputed bytes and never touch the vision loop. Waiters
+    are woken when a new version is published.
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.version = 0
+        self.state = None
+        self._publish(0, "Active", time.time())
+
+    def publish(self, count, status, timestamp=None):
+        """Publish the count and system status; does nothing if neither changed"""
+        if (count, status) == self.state:
+            return False
+        self._publish(count, status, time.time() if timestamp is None else timestamp)
+        return True
+
+    def _publish(self, count, status, timestamp):
+        with self.condition:
+            self.version += 1
+            self.state = (count, status)
+            self.etag = make_etag(self.version)
+            self.body = json.dumps({
+                "count": count,
+                "status": status,
+                "version": self.version,
+                "updated": datetime.fromtimestamp(timestamp).isoformat(),
+                "ts": round(timestamp, 3)
+            }).encode()
+            self.condition.notify_all()
+
+    def snapshot(self):
+        """Return (version, etag, body) of the current snapshot"""
+        with self.condition:
+            return self.version, self.etag, self.body
+
+    def wait(self, version, timeout):
+        """
+        Wait until the snapshot is newer than version or the timeout expires.
+
+        Returns the current (version, etag, body) either way.
+        """
+        deadline = time.time() + timeout
+        with self.condition:
+            while self.version == version:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self.condition.wait(remaining)
+            return self.version, self.etag, self.body
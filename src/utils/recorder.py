@@ -0,0 +1,203 @@
+import logging
+import os
+import struct
+import time
+from collections import deque
+from datetime import datetime
+
+from utils.threads import threading, queue
+
+logger = logging.getLogger(__name__)
+
+
+def write_mjpeg_avi(path, frames, width, height):
+    """
+    Write already-encoded JPEG frames to an MJPEG AVI file without re-encoding.
+
+    Parameters:
+        path: Destination file path.
+        frames: A list of (timestamp, jpeg) tuples in capture order.
+        width: Frame width in pixels.
+        height: Frame height in pixels.
+    """
+    # Derive the frame rate from the capture timestamps
+    duration = frames[-1][0] - frames[0][0]
+    fps = (len(frames) - 1) / duration if len(frames) > 1 and duration > 0 else 1.0
+    rate = max(1, int(round(fps * 1000)))
+    max_frame = max(len(jpeg) for _, jpeg in frames)
+
+    chunk_sizes = [len(jpeg) + (len(jpeg) & 1) for _, jpeg in frames]
+    movi_size = 4 + sum(8 + size for size in chunk_sizes)
+    idx_size = 16 * len(frames)
+
+    avih = struct.pack('<14I', int(1000000 / fps), max_frame * int(fps + 1), 0, 0x10,
+                       len(frames), 0, 1, max_frame, width, height, 0, 0, 0, 0)
+    strh = (b'vidsMJPG' + struct.pack('<IHHIIIIIIIIhhhh', 0, 0, 0, 0, 1000, rate, 0,
+                                      len(frames), max_frame, 0xFFFFFFFF, 0, 0, 0, width, height))
+    strf = struct.pack('<IiiHH4sIiiII', 40, width, height, 1, 24, b'MJPG', width * height * 3, 0, 0, 0, 0)
+
+    strl = b'strl' + _chunk(b'strh', strh) + _chunk(b'strf', strf)
+    hdrl = b'hdrl' + _chunk(b'avih', avih) + _chunk(b'LIST', strl)
+    riff_size = 4 + 8 + len(hdrl) + 8 + movi_size + 8 + idx_size
+
+    with open(path, 'wb') as f:
+        f.write(b'RIFF' + struct.pack('<I', riff_size) + b'AVI ')
+        f.write(_chunk(b'LIST', hdrl))
+        f.write(b'LIST' + struct.pack('<I', movi_size) + b'movi')
+        for _, jpeg in frames:
+            f.write(b'00dc' + struct.pack('<I', len(jpeg)))
+            f.write(jpeg)
+            if len(jpeg) & 1:
+                f.write(b'\0')
+
+        # Index offsets are relative to the 'movi' fourcc
+        f.write(b'idx1' + struct.pack('<I', idx_size))
+        offset = 4
+        for (_, jpeg), size in zip(frames, chunk_sizes):
+            f.write(b'00dc' + struct.pack('<III', 0x10, offset, len(jpeg)))
+            offset += 8 + size
+
+
+def _chunk(fourcc, data):
+    return fourcc + struct.pack('<I', len(data)) + data
+
+
+class ClipRecorder:
+    """
+    Keeps a memory-bounded ring of encoded JPEG frames and writes clips around events.
+
+    Half of the memory budget holds the pre-roll ring, the other half bounds the
+    clips that are collecting post-roll or waiting for the background writer.
+    Pushing frames and triggering clips only moves references around, so the
+    capture loop is never blocked by recording.
+    """
+
+    def __init__(self, output_dir, memory_budget, pre_roll=10.0, post_roll=10.0,
+                 max_pending=4, on_saved=None):
+        self.output_dir = output_dir
+        self.ring_budget = memory_budget // 2
+        self.clip_budget = memory_budget - self.ring_budget
+        self.pre_roll = pre_roll
+        self.post_roll = post_roll
+        self.on_saved = on_saved
+
+        self.frames = deque()
+        self.ring_bytes = 0
+        self.active_clip = None
+        self.clip_bytes = 0
+        self.saved_clips = deque(maxlen=100)
+
+        self.lock = threading.Lock()
+        self.write_queue = queue.Queue(maxsize=max_pending)
+        self.writer = None
+
+    def push(self, jpeg, timestamp, size):
+        """Add an encoded frame to the ring (and to the clip collecting post-roll)"""
+        frame = (timestamp, jpeg, size)
+        self.frames.append(frame)
+        self.ring_bytes += len(jpeg)
+
+        # Evict frames beyond the pre-roll window or the ring budget
+        while self.frames and (self.ring_bytes > self.ring_budget or
+                               timestamp - self.frames[0][0] > self.pre_roll):
+            _, old_jpeg, _ = self.frames.popleft()
+            self.ring_bytes -= len(old_jpeg)
+
+        if self.active_clip is not None:
+            if self._reserve(len(jpeg)):
+                self.active_clip["frames"].append(frame)
+                self.active_clip["bytes"] += len(jpeg)
+            else:
+                # Out of clip memory, close the clip with what it has
+                self.active_clip["end"] = timestamp
+
+        self.poll(timestamp)
+
+    def is_recording(self):
+        """True while a clip is collecting post-roll frames"""
+        return self.active_clip is not None
+
+    def trigger(self, reason, timestamp=None):
+        """Start a clip with the buffered pre-roll; returns False if it was dropped"""
+        timestamp = time.time() if timestamp is None else timestamp
+
+        # Overlapping triggers extend the clip that is already recording
+        if self.active_clip is not None:
+            self.active_clip["end"] = timestamp + self.post_roll
+            return True
+
+        pre_roll = list(self.frames)
+        pre_roll_bytes = sum(len(jpeg) for _, jpeg, _ in pre_roll)
+        if not pre_roll or not self._reserve(pre_roll_bytes):
+            logger.warning("Clip '%s' dropped: no buffered frames or clip memory budget exhausted", reason)
+            return False
+
+        self.active_clip = {
+            "reason": reason,
+            "start": timestamp,
+            "end": timestamp + self.post_roll,
+            "frames": pre_roll,
+            "bytes": pre_roll_bytes
+        }
+        return True
+
+    def poll(self, now=None):
+        """Hand the active clip to the writer once its post-roll is complete"""
+        now = time.time() if now is None else now
+        clip = self.active_clip
+        if clip is None or now < clip["end"]:
+            return
+
+        self.active_clip = None
+        self._start_writer()
+        try:
+            self.write_queue.put_nowait(clip)
+        except queue.Full:
+            logger.warning("Clip '%s' dropped: writer queue is full", clip['reason'])
+            self._release(clip["bytes"])
+
+    def _reserve(self, size):
+        with self.lock:
+            if self.clip_bytes + size > self.clip_budget:
+                return False
+            self.clip_bytes += size
+            return True
+
+    def _release(self, size):
+        with self.lock:
+            self.clip_bytes -= size
+
+    def _start_writer(self):
+        if self.writer is None:
+            self.writer = threading.Thread(target=self._writer_loop, name="clip-writer", daemon=True)
+            self.writer.start()
+
+    def _writer_loop(self):
+        while True:
+            clip = self.write_queue.get()
+            try:
+                self._write_clip(clip)
+            except Exception:
+                logger.exception("Error writing clip")
+            finally:
+                self._release(clip["bytes"])
+
+    def _write_clip(self, clip):
+        os.makedirs(self.output_dir, exist_ok=True)
+        started = datetime.fromtimestamp(clip["frames"][0][0])
+        filename = f"clip_{started.strftime('%Y%m%d_%H%M%S')}_{clip['reason']}.avi"
+        path = os.path.join(self.output_dir, filename)
+
+        width, height = clip["frames"][0][2]
+        write_mjpeg_avi(path, [(timestamp, jpeg) for timestamp, jpeg, _ in clip["frames"]], width, height)
+
+        info = {
+            "file": path,
+            "reason": clip["reason"],
+            "trigger_time": datetime.fromtimestamp(clip["start"]).isoformat(),
+            "frames": len(clip["frames"]),
+            "bytes": clip["bytes"]
+        }
+        self.saved_clips.append(info)
+        if self.on_saved:
+            self.on_saved(info)
@@ -0,0 +1,85 @@
+import math
+import threading
+import time
+from collections import deque
+
+# (bucket size in seconds, number of buckets kept): 1 hour of seconds, 1 day of
+# 10 seconds, 7 days of minutes, 30 days of 5 minutes and 90 days of hours
+DEFAULT_LEVELS = ((1, 3600), (10, 24 * 360), (60, 7 * 24 * 60), (300, 30 * 24 * 12), (3600, 90 * 24))
+
+
+class RollupSeries:
+    """
+    Incrementally maintained min/avg/max rollups of a value at several resolutions.
+
+    Every sample updates the newest bucket of each resolution in O(1), so long
+    range queries never have to touch raw samples.
+    """
+
+    def __init__(self, levels=DEFAULT_LEVELS):
+        self.levels = [(resolution, deque(maxlen=size)) for resolution, size in levels]
+        self.lock = threading.Lock()
+
+    def add(self, value, timestamp=None):
+        """Fold a sample into the current bucket of every resolution"""
+        timestamp = time.time() if timestamp is None else timestamp
+        with self.lock:
+            for resolution, buckets in self.levels:
+                start = int(timestamp // resolution) * resolution
+                if buckets and buckets[-1][0] >= start:
+                    # Same bucket (late samples are folded into the newest one)
+                    bucket = buckets[-1]
+                    bucket[1] = min(bucket[1], value)
+                    bucket[2] = max(bucket[2], value)
+                    bucket[3] += value
+                    bucket[4] += 1
+                else:
+                    buckets.append([start, value, value, value, 1])
+
+    def query(self, start, end, max_points=500):
+        """
+        Return (resolution, points) for the range [start, end].
+
+        Reads the coarsest stored resolution that is still at least as fine as
+        the range needs (span / max_points) and whose retention covers the
+        range, then merges adjacent buckets so at most max_points remain. The
+        returned resolution is the merged bucket size. Each point is a dict with
+        the bucket start time "t" (seconds since the epoch, aligned to the
+        resolution) and its min, avg and max.
+        """
+        span = max(end - start, 1)
+        max_points = max(int(max_points), 1)
+        covering = [(resolution, buckets) for resolution, buckets in self.levels
+                    if resolution * buckets.maxlen >= span] or [self.levels[-1]]
+        level_resolution, buckets = covering[0]
+        for resolution, level_buckets in covering:
+            if resolution <= span / max_points:
+                level_resolution, buckets = resolution, level_buckets
+
+        # Merge groups of adjacent buckets, aligned so points stay put between queries
+        resolution = level_resolution * max(1, math.ceil(span / (level_resolution * max_points)))
+
+        merged = []
+        with self.lock:
+            # Walk back from the newest bucket so the cost is proportional to the range
+            for bucket_start, low, high, total, samples in reversed(buckets):
+                if bucket_start + level_resolution <= start:
+                    break
+                if bucket_start > end:
+                    continue
+                group_start = bucket_start // resolution * resolution
+                if merged and merged[-1][0] == group_start:
+                    group = merged[-1]
+                    group[1] = min(group[1], low)
+                    group[2] = max(group[2], high)
+                    group[3] += total
+                    group[4] += samples
+                elif len(merged) < max_points:
+                    merged.append([group_start, low, high, total, samples])
+                else:
+                    # A partial group at the start of the range would exceed max_points
+                    break
+
+        points = [{"t": group_start, "min": low, "avg": round(total / samples, 2), "max": high}
+                  for group_start, low, high, total, samples in reversed(merged)]
+        return resolution, points
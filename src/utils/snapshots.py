@@ -0,0 +1,65 @@
+import cv2
+import numpy as np
+
+from utils.etags import make_etag
+
+# Reduced JPEG decoding lets libjpeg scale by 1/2, 1/4 or 1/8 while decoding
+REDUCED_DECODE_FLAGS = ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4),
+                        (2, cv2.IMREAD_REDUCED_COLOR_2))
+
+
+class SnapshotCache:
+    """
+    Still images of the latest encoded frame, at full size or downscaled.
+
+    Full-size snapshots are the stream's JPEG itself. Requested widths are
+    rounded up to one of a few allowed widths, so a client cannot make the
+    server resize to arbitrary sizes; each is produced at most once per frame
+    and reused by every request for it until the next frame arrives.
+    """
+
+    def __init__(self, quality=85, widths=(160, 320, 640, 1280)):
+        self.encode_params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+        self.widths = sorted(widths)
+        self.seq = None
+        self.sizes = {}
+
+    def width_for(self, width, frame_width):
+        """The allowed width to serve for a requested width; None means the full frame"""
+        if width is None:
+            return None
+        width = next((allowed for allowed in self.widths if allowed >= width), None)
+        return width if width is not None and width < frame_width else None
+
+    def etag(self, seq, width=None):
+        # Frame sequence numbers are process-wide and never reused, also across camera changes
+        return make_etag(seq, width or 'full')
+
+    def get(self, jpeg, seq, size, width=None):
+        """Return the JPEG of frame seq (size is its (width, height)) at a width from width_for()"""
+        if width is None or width >= size[0]:
+            return jpeg
+        if seq != self.seq:
+            self.seq = seq
+            self.sizes = {}
+
+        data = self.sizes.get(width)
+        if data is None:
+            data = self.sizes[width] = self._downscale(jpeg, size, width)
+        return data
+
+    def _downscale(self, jpeg, size, width):
+        full_width, height = size
+        buffer = np.frombuffer(jpeg, dtype=np.uint8)
+
+        # Decode at the smallest reduction that is still at least as wide as requested
+        flag = cv2.IMREAD_COLOR
+        for factor, reduced_flag in REDUCED_DECODE_FLAGS:
+            if full_width // factor >= width:
+                flag = reduced_flag
+                break
+        image = cv2.imdecode(buffer, flag)
+        size = (width, max(1, round(height * width / full_width)))
+        image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+        _, encoded = cv2.imencode('.jpg', image, self.encode_params)
+        return memoryview(encoded.reshape(-1))
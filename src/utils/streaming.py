@@ -0,0 +1,26 @@
+from eventlet.hubs import trampoline
+
+
+def send_buffers(sock, buffers):
+    """
+    Write buffers to an eventlet green socket with scatter/gather sendmsg calls.
+
+    The buffers are handed to the kernel as they are instead of being joined
+    into one bytes object first. The socket's non-blocking OS socket is
+    written directly, and the greenlet waits on the hub while it is full.
+    Partial writes are resumed through memoryview slices, which copy nothing.
+    """
+    raw = sock.fd
+    views = [view for view in (memoryview(buffer).cast('B') for buffer in buffers) if len(view)]
+    while views:
+        try:
+            sent = raw.sendmsg(views)
+        except BlockingIOError:
+            trampoline(raw, write=True)
+            continue
+        while sent:
+            if sent >= len(views[0]):
+                sent -= len(views.pop(0))
+            else:
+                views[0] = views[0][sent:]
+                sent = 0
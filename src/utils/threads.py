@@ -0,0 +1,11 @@
+# The web app monkey patches the standard library with eventlet, which turns
+# threading and queue into green versions scheduled on the hub. Background
+# workers that block (disk writes, sampling) import the real OS primitives
+# from here so they never stall the capture loop.
+try:
+    from eventlet.patcher import original
+    threading = original('threading')
+    queue = original('queue')
+except ImportError:
+    import threading
+    import queue
@@ -1,27 +1,66 @@
 # Import eventlet first and monkey patch
 import eventlet
 eventlet.monkey_patch()
+import eventlet.wsgi
 
 # Standard library imports
 import cv2
 import base64
 import json
+import logging
 import threading
 import os
 import csv
 import time
 import io
-from datetime import datetime, timedelta
+import hmac
+import itertools
+import math
+from datetime import datetime, timedelta, timezone
 
 # Flask and SocketIO imports
 from flask import Flask, render_template, Response, jsonify, send_file, request
 from flask_socketio import SocketIO, emit
+from werkzeug.http import is_resource_modified
 
 # Local imports
 from detector.yolo import YOLODetector
 from counter.counter import PersonCounter
 from utils.visualization import draw_results
+from utils.metadata import build_frame_metadata
+from utils.events import EventRegistry, RateLimiter
+from utils.recorder import ClipRecorder
+from utils.rollups import RollupSeries
+from utils.publisher import CountPublisher
+from utils.consumers import ConsumerTracker
+from utils.profiler import profile_stage, SamplingProfiler, PipelineProfile
+from utils.snapshots import SnapshotCache
+from utils.heatmap import OccupancyHeatmap
+from utils.log import setup_logging
+from utils.streaming import send_buffers
+from detector.pool import DetectorPool
 from camera.picamera_fixed import Camera  # Using the fixed camera implementation
+from camera.synthetic import SyntheticCamera
+from config import SERVER_SIDE_OVERLAY, EVENT_HISTORY_SIZE, EVENT_EMIT_INTERVAL
+from config import CAMERA_SOURCE, CAMERA_RESOLUTION, FRAME_RATE, WEB_PORT, FRAME_BUFFER_COUNT
+from config import DETECTOR_WORKERS, DETECTOR_CV_THREADS, DETECTOR_MAX_IN_FLIGHT, OPENCV_THREADS
+from config import (CLIP_RECORDING_ENABLED, CLIP_OUTPUT_DIR, CLIP_MEMORY_BUDGET,
+                    CLIP_PRE_ROLL_SECONDS, CLIP_POST_ROLL_SECONDS, CLIP_COUNT_THRESHOLD)
+from config import COUNT_POLL_MAX_TIMEOUT, COUNT_STREAM_KEEPALIVE, PIPELINE_IDLE_INTERVAL, CAPTURE_RETRY_DELAY
+from config import ADMIN_TOKEN, PROFILE_MAX_SECONDS, PROFILE_SAMPLE_INTERVAL
+from config import (SNAPSHOT_MAX_AGE, SNAPSHOT_WAIT_TIMEOUT, SNAPSHOT_LEASE_SECONDS, SNAPSHOT_QUALITY,
+                    SNAPSHOT_WIDTHS)
+from config import (HEATMAP_GRID, HEATMAP_HALF_LIFE, HEATMAP_SNAPSHOT_INTERVAL, HEATMAP_SNAPSHOTS,
+                    HEATMAP_RENDER_INTERVAL)
+from config import (LOG_LEVEL, LOG_LEVELS, LOG_FORMAT, LOG_FILE, LOG_QUEUE_SIZE, LOG_RATE_LIMIT_INTERVAL,
+                    LOG_RATE_LIMIT_BURST, OPENCV_LOG_LEVEL)
+
+JPEG_ENCODE_PARAMS = [cv2.IMWRITE_JPEG_QUALITY, 90]
+
+# Log records are written by a background thread so the frame loop never waits on I/O
+setup_logging(LOG_LEVEL, LOG_LEVELS, LOG_FORMAT == "json", LOG_FILE, LOG_QUEUE_SIZE,
+              LOG_RATE_LIMIT_INTERVAL, LOG_RATE_LIMIT_BURST, OPENCV_LOG_LEVEL)
+logger = logging.getLogger("web_app")
 
 # Initialize Flask and SocketIO
 app = Flask(__name__)
@@ -30,13 +69,16 @@ socketio = SocketIO(app, async_mode='eventlet', cors_allowed_origins='*')
 
 # Global variables
 with app.app_context():
-    detector = YOLODetector()
+    # In-process detector, only loaded when no worker pool runs detection
+    detector = None
     counter = PersonCounter()
     sensitivity = "Medium"
     current_camera = 0  # Using /dev/video0 which is the video capture interface
     is_paused = False
     last_frame = None
     system_status = "Active"
+    last_emitted_status = "Active"
+    status_limiter = RateLimiter(EVENT_EMIT_INTERVAL)
     logging_enabled = True
     logging_frequency = 60  # seconds
     last_log_time = datetime.now()
@@ -45,30 +87,51 @@ with app.app_context():
         "average": 0,
         "minimum": 0,
         "peak": 0,
-        "total_counts": []
+        "total_counts": [],
+        "inference": {}
     }
     logs = []
-    errors = []
+    events = EventRegistry(EVENT_HISTORY_SIZE, EVENT_EMIT_INTERVAL, notify=lambda event: emit_event(event))
+    clip_recorder = None
+    count_rollups = RollupSeries()
+    count_publisher = CountPublisher()
+    consumers = ConsumerTracker()
+    snapshots = SnapshotCache(SNAPSHOT_QUALITY, SNAPSHOT_WIDTHS)
+    heatmap = OccupancyHeatmap(HEATMAP_GRID, HEATMAP_HALF_LIFE, HEATMAP_SNAPSHOT_INTERVAL,
+                               HEATMAP_SNAPSHOTS, HEATMAP_RENDER_INTERVAL)
+    # Frame sequence numbers are process-wide so they keep increasing across camera changes
+    frame_sequence = itertools.count(1)
+    # Set while an admin cProfile run is collecting pipeline frames
+    pipeline_profile = None
+    profile_lock = eventlet.semaphore.Semaphore()
+    detector_pool = None
+
+def create_camera(camera_id):
+    """Create the capture source selected by CAMERA_SOURCE"""
+    if CAMERA_SOURCE == "synthetic":
+        return SyntheticCamera(camera_id=camera_id, resolution=CAMERA_RESOLUTION, frame_rate=FRAME_RATE,
+                               buffer_count=FRAME_BUFFER_COUNT)
+    return Camera(camera_id=camera_id)
 
 class VideoCamera:
     def __init__(self):
         global current_camera
-        print(f"Initializing camera with ID 0")  # Changed to always try video0 first
+        logger.info("Initializing camera with ID 0")  # Changed to always try video0 first
         current_camera = 0  # Changed from 1 to 0
         retries = 3
         last_error = None
         
         for attempt in range(retries):
             try:
-                self.camera = Camera(camera_id=current_camera)
+                self.camera = create_camera(current_camera)
                 self.camera.start_camera()
-                print("Camera initialized successfully")
+                logger.info("Camera initialized successfully")
                 break
             except Exception as e:
                 last_error = str(e)
-                print(f"Attempt {attempt + 1}/{retries} failed: {str(e)}")
+                logger.warning("Camera attempt %d/%d failed: %s", attempt + 1, retries, e)
                 if attempt < retries - 1:
-                    print("Retrying in 2 seconds...")
+                    logger.info("Retrying in 2 seconds...")
                     time.sleep(2)
                     continue
                 raise RuntimeError(f"Failed to initialize camera after {retries} attempts. Last error: {last_error}")
@@ -76,6 +139,12 @@ class VideoCamera:
         self.lock = eventlet.semaphore.Semaphore()
         self.is_tracking = False
         self.last_frame = None
+        self.last_frame_seq = 0
+        self.last_frame_time = 0.0
+        self.last_metadata = None
+        self.capture_failed = False
+        self.frame_seq = 0
+        self.last_inference_seq = 0
         self.frame_count = 0
         self.fps_start_time = time.time()
         self.fps = 0
@@ -83,14 +152,46 @@ class VideoCamera:
     def __del__(self):
         self.camera.stop_camera()
 
+    def needs_inference(self):
+        """Detection runs while tracking, or once a log entry is due"""
+        if self.is_tracking:
+            return True
+        return logging_enabled and (datetime.now() - last_log_time).total_seconds() >= logging_frequency
+
+    def needs_encoding(self):
+        """Frames are encoded for stream viewers, leased consumers and an armed clip recorder"""
+        recorder_armed = clip_recorder is not None and (self.is_tracking or clip_recorder.is_recording())
+        return consumers.viewers > 0 or recorder_armed or consumers.has_lease()
+
+    def has_demand(self):
+        return self.needs_encoding() or self.needs_inference()
+
+    def reset_fps(self):
+        """Restart the FPS measurement, e.g. after the pipeline was idle"""
+        self.frame_count = 0
+        self.fps_start_time = time.time()
+
+    @profile_stage("frame")
     def get_frame(self):
-        global is_paused, last_frame, system_status, last_log_time, logs, logging_enabled, logging_frequency
-        
-        if is_paused and self.last_frame is not None:
-            return self.last_frame
+        """
+        Capture one frame and run the stages that currently have consumers.
+
+        Inference only runs when needs_inference() and encoding only when
+        needs_encoding(). Returns the encoded frame, or None if the capture
+        failed or nothing needed the frame encoded.
+        """
+        global last_frame, system_status, last_log_time, logs, logging_enabled, logging_frequency
             
         with self.lock:
+            # Finish clips whose post-roll has elapsed even if the camera stopped delivering frames
+            if clip_recorder:
+                clip_recorder.poll()
+
+            run_inference = self.needs_inference()
+            encode = self.needs_encoding()
+
             success, frame = self.camera.capture_frame()
+            self.capture_failed = not success
             
             # Calculate FPS
             self.frame_count += 1
@@ -101,15 +202,19 @@ class VideoCamera:
                 self.fps_start_time = time.time()
             
             if not success:
-                system_status = "Error"
-                add_error("camera-disconnected", "Camera disconnected", 
-                         "The camera connection has been lost. Please check your camera settings.")
-                socketio.emit('system_status', {'state': system_status, 'message': 'Camera disconnected'})
+                if add_error("camera-disconnected", "Camera disconnected", 
+                             "The camera connection has been lost. Please check your camera settings.") and clip_recorder:
+                    clip_recorder.trigger("camera-disconnected")
+                update_system_status("Error", 'Camera disconnected')
                 return None
-            else:
-                system_status = "Active"
 
-            if self.is_tracking:
+            events.resolve("camera-disconnected")
+            status, status_message = "Active", "System running normally"
+
+            self.frame_seq = next(frame_sequence)
+            frame_time = time.time()
+
+            if run_inference:
                 with app.app_context():
                     try:
                         # Set sensitivity based on the global setting
@@ -118,83 +223,494 @@ class VideoCamera:
                             "Medium": 0.5,
                             "High": 0.6
                         }
-                        detector.confidence_threshold = sensitivity_values.get(sensitivity, 0.5)
-                        
-                        detections = detector.detect(frame)
-                        count = counter.update(detections)
-                        frame = draw_results(frame, detections, count)
-                        
-                        # Update statistics
-                        stats["current_count"] = count
-                        stats["total_counts"].append(count)
-                        stats["average"] = sum(stats["total_counts"]) / len(stats["total_counts"])
-                        stats["minimum"] = min(stats["total_counts"])
-                        stats["peak"] = max(stats["total_counts"])
-                        
-                        # Limit stats history to prevent memory issues
-                        if len(stats["total_counts"]) > 1000:
-                            stats["total_counts"] = stats["total_counts"][-1000:]
-                            
-                        socketio.emit('stats_update', stats)
+                        confidence_threshold = sensitivity_values.get(sensitivity, 0.5)
                         
-                        # Log data based on frequency setting
-                        if logging_enabled:
-                            current_time = datetime.now()
-                            if (current_time - last_log_time).total_seconds() >= logging_frequency:
-                                log_entry = {
-                                    "timestamp": current_time.isoformat(),
-                                    "count": count,
-                                    "status": system_status
-                                }
-                                logs.append(log_entry)
-                                
-                                # Limit logs to 10000 entries
-                                if len(logs) > 10000:
-                                    logs = logs[-10000:]
-                                    
-                                last_log_time = current_time
+                        if detector_pool:
+                            if self.last_inference_seq != self.frame_seq - 1:
+                                # A new run of inference; results still owed from an earlier one are stale
+                                detector_pool.new_session()
+                            # Frames go to the worker pool; results come back in frame order a few frames later
+                            results = detector_pool.collect()
+                            detector_pool.submit(self.frame_seq, frame, confidence_threshold,
+                                                 (frame_time, frame.shape))
+                        else:
+                            detector.confidence_threshold = confidence_threshold
+                            results = [(self.frame_seq, (frame_time, frame.shape), detector.detect(frame), None,
+                                        detector.last_timings)]
+                        self.last_inference_seq = self.frame_seq
+
+                        for seq, (result_time, result_shape), detections, error, timings in results:
+                            if error:
+                                raise RuntimeError(error)
+                            if not self.is_tracking:
+                                # Detection only ran for a due log entry; nothing is tracked, shown or recorded
+                                self.log_count(len(detections), status)
+                                continue
+                            stats["inference"] = timings
+                            count = self.update_counts(seq, result_time, result_shape, detections, status)
+                            if SERVER_SIDE_OVERLAY:
+                                frame = draw_results(frame, detections, count)
+
+                        if detector_pool and not detector_pool.available():
+                            # Counting has stopped until a worker is restarted
+                            raise RuntimeError("No detector worker is running")
+                        events.resolve("detection-error")
                     except Exception as e:
-                        print(f"Error during detection: {str(e)}")
-                        system_status = "Error"
+                        logger.exception("Error during detection")
+                        status, status_message = "Error", "Detection error"
                         add_error("detection-error", "Detection error", 
                                  f"An error occurred during people detection: {str(e)}")
-                        socketio.emit('system_status', {'state': system_status, 'message': 'Detection error'})
 
             # Check for low frame rate
             if self.fps < 10 and self.is_tracking:
-                system_status = "Warning"
+                if status == "Active":
+                    status, status_message = "Warning", "Low frame rate"
                 add_error("low-fps", "Low frame rate detected", 
                          f"The current frame rate ({self.fps:.1f} FPS) is lower than recommended. This may affect detection accuracy.")
-                socketio.emit('system_status', {'state': system_status, 'message': 'Low frame rate'})
+            else:
+                events.resolve("low-fps")
+
+            update_system_status(status, status_message)
+
+            if not encode:
+                return None
                 
             # Add FPS to frame
-            cv2.putText(frame, f"FPS: {self.fps:.1f}", (10, 30), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+            if SERVER_SIDE_OVERLAY:
+                cv2.putText(frame, f"FPS: {self.fps:.1f}", (10, 30), 
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
 
             # Encode the frame
-            _, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
-            self.last_frame = jpeg.tobytes()
+            _, jpeg = cv2.imencode('.jpg', frame, JPEG_ENCODE_PARAMS)
+            # Share the encoder's buffer through a memoryview instead of copying it into bytes
+            self.last_frame = memoryview(jpeg.reshape(-1))
+            self.last_frame_seq = self.frame_seq
+            self.last_frame_time = frame_time
+            consumers.publish_frame(self.last_frame, self.frame_seq, frame_time, (frame.shape[1], frame.shape[0]))
+            if clip_recorder:
+                clip_recorder.push(self.last_frame, frame_time, (frame.shape[1], frame.shape[0]))
             last_frame = self.last_frame
             return self.last_frame
 
+    def update_counts(self, seq, frame_time, frame_shape, detections, status):
+        """Update the counter, statistics, metadata and logs with the detections of one frame"""
+        previous_count = stats["current_count"]
+        count = counter.update(detections)
+        heatmap.add(detections, frame_shape, frame_time)
+        if clip_recorder and previous_count < CLIP_COUNT_THRESHOLD <= count:
+            clip_recorder.trigger("count-threshold", frame_time)
+
+        # Publish detections keyed to the frame sequence so clients can draw overlays
+        self.last_metadata = build_frame_metadata(
+            seq, frame_time, frame_shape, detections,
+            counter.track_ids, count, self.fps)
+        socketio.emit('detections', self.last_metadata)
+        
+        # Update statistics
+        stats["current_count"] = count
+        stats["total_counts"].append(count)
+        stats["average"] = sum(stats["total_counts"]) / len(stats["total_counts"])
+        stats["minimum"] = min(stats["total_counts"])
+        stats["peak"] = max(stats["total_counts"])
+        count_rollups.add(count, frame_time)
+        
+        # Limit stats history to prevent memory issues
+        if len(stats["total_counts"]) > 1000:
+            stats["total_counts"] = stats["total_counts"][-1000:]
+            
+        socketio.emit('stats_update', stats)
+        self.log_count(count, status)
+        return count
+
+    def log_count(self, count, status):
+        """Append a log entry if one is due by the logging frequency setting"""
+        global last_log_time, logs
+
+        if logging_enabled:
+            current_time = datetime.now()
+            if (current_time - last_log_time).total_seconds() >= logging_frequency:
+                log_entry = {
+                    "timestamp": current_time.isoformat(),
+                    "count": count,
+                    "status": status
+                }
+                logs.append(log_entry)
+                
+                # Limit logs to 10000 entries
+                if len(logs) > 10000:
+                    logs = logs[-10000:]
+                    
+                last_log_time = current_time
+
+if OPENCV_THREADS is not None:
+    cv2.setNumThreads(OPENCV_THREADS)
+
+if DETECTOR_WORKERS > 0:
+    detector_pool = DetectorPool(DETECTOR_WORKERS, DETECTOR_CV_THREADS, DETECTOR_MAX_IN_FLIGHT)
+else:
+    detector = YOLODetector()
+
+if CLIP_RECORDING_ENABLED:
+    clip_recorder = ClipRecorder(CLIP_OUTPUT_DIR, CLIP_MEMORY_BUDGET,
+                                 pre_roll=CLIP_PRE_ROLL_SECONDS, post_roll=CLIP_POST_ROLL_SECONDS,
+                                 on_saved=lambda clip: log_message(f"Clip saved: {clip['file']}"))
+
 video_stream = VideoCamera()
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
-def generate_frames():
+# Each part starts with the line break that terminates the previous frame
+MJPEG_PART_HEADER = b'\r\n--frame\r\nContent-Type: image/jpeg\r\n'
+MJPEG_MIMETYPE = 'multipart/x-mixed-replace; boundary=frame'
+# The stream ends when the connection closes, so it needs no chunked encoding. The
+# header block is ended by the line break that starts the first part.
+MJPEG_RESPONSE_HEADER = (f'HTTP/1.1 200 OK\r\nContent-Type: {MJPEG_MIMETYPE}\r\n'
+                         'Cache-Control: no-cache\r\nConnection: close\r\n').encode()
+
+def run_pipeline():
+    """
+    Background task that drives capture, inference and encoding.
+
+    Frames are captured only while something needs them: stream viewers,
+    tracking, a due log entry, an armed clip recorder or a leased consumer.
+    Otherwise (and while paused) the task sleeps until a consumer appears.
+    """
+    idle = True
     while True:
-        frame = video_stream.get_frame()
-        if frame is not None:
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n\r\n')
-        eventlet.sleep(0.033)  # ~30 FPS
+        flush_notifications()
+        stream = video_stream
+        if is_paused or not stream.has_demand():
+            if not idle:
+                logger.info("Pipeline idle: no consumers")
+                idle = True
+                # The frame rate no longer matters once nothing is being processed
+                events.resolve("low-fps")
+                if system_status == "Warning":
+                    update_system_status("Active", "Idle, no consumers")
+            if clip_recorder:
+                clip_recorder.poll()
+            consumers.wait_for_demand(PIPELINE_IDLE_INTERVAL)
+            continue
+
+        if idle:
+            logger.info("Pipeline active")
+            stream.reset_fps()
+            idle = False
+
+        profile = pipeline_profile
+        if profile:
+            profile.enable()
+        try:
+            stream.get_frame()
+        except Exception as e:
+            # Keep the pipeline alive; the next frame gets a fresh attempt
+            logger.exception("Error processing frame")
+            add_error("pipeline-error", "Frame processing error", str(e))
+            stream.capture_failed = True
+        finally:
+            if profile:
+                profile.disable()
+
+        if stream.capture_failed:
+            socketio.sleep(CAPTURE_RETRY_DELAY)
+        else:
+            # Let viewers and socket handlers run between frames
+            socketio.sleep(0)
+
+pipeline_task = None
+
+def start():
+    """
+    Start the pipeline background task; call it before serving requests.
+
+    Safe to call more than once, the task is only started the first time.
+    """
+    global pipeline_task
+    if pipeline_task is None:
+        pipeline_task = socketio.start_background_task(run_pipeline)
+    return pipeline_task
+
+def generate_parts():
+    """Yield (part header, encoded frame) pairs of the MJPEG stream for one viewer"""
+    # Viewers only wait for frames; the pipeline encodes each frame once for all of them
+    consumers.add_viewer()
+    try:
+        seq = 0
+        while True:
+            frame, seq, frame_time = consumers.wait_for_frame(seq, PIPELINE_IDLE_INTERVAL)
+            if frame is None:
+                continue
+            # Sequence/timestamp headers let non-browser consumers pair frames with detection metadata
+            headers = (f'Content-Length: {len(frame)}\r\n'
+                       f'X-Frame-Seq: {seq}\r\n'
+                       f'X-Frame-Timestamp: {frame_time:.3f}\r\n\r\n').encode()
+            yield MJPEG_PART_HEADER + headers, frame
+    finally:
+        consumers.remove_viewer()
+
+def generate_frames():
+    for headers, frame in generate_parts():
+        yield headers
+        yield frame
+
+def stream_frames(sock):
+    """
+    Write the MJPEG stream straight to the client socket until the client goes away.
+
+    eventlet's WSGI writer joins each part header with the frame and then
+    copies both again to frame them as an HTTP chunk. Here every part leaves
+    with one sendmsg of its small header and the encoder's shared buffer.
+    """
+    parts = generate_parts()
+    try:
+        send_buffers(sock, [MJPEG_RESPONSE_HEADER])
+        for headers, frame in parts:
+            send_buffers(sock, [headers, frame])
+    except OSError:
+        pass
+    finally:
+        parts.close()
 
 @app.route('/video_feed')
 def video_feed():
-    return Response(generate_frames(),
-                    mimetype='multipart/x-mixed-replace; boundary=frame')
+    connection = request.environ.get('eventlet.input')
+    if connection is None:
+        # Not served by eventlet (e.g. the Flask test client): stream through the WSGI response
+        return Response(generate_frames(), mimetype=MJPEG_MIMETYPE)
+
+    stream_frames(connection.get_socket())
+    # The response was written to the socket directly; eventlet only closes the connection
+    eventlet.wsgi.WSGI_LOCAL.already_handled = True
+    return Response(b'')
+
+@app.route('/snapshot.jpg')
+def snapshot():
+    """
+    Latest encoded frame as a still image, downscaled with ?width=N.
+
+    Served from the frame the pipeline already encoded; ETag and Last-Modified
+    follow the frame sequence, so unchanged polls get 304 Not Modified. A stale
+    frame is refreshed with a lease just long enough for one new frame, so
+    pollers alone do not keep the pipeline running. N is rounded up to one of
+    SNAPSHOT_WIDTHS.
+    """
+    width = request.args.get('width', type=int)
+    if width is not None and width < 1:
+        return jsonify({"error": "width must be positive"}), 400
+
+    frame, seq, frame_time, size = consumers.latest()
+    # While paused no new frame is coming; serve the last one
+    if not is_paused and (frame is None or time.time() - frame_time > SNAPSHOT_MAX_AGE):
+        consumers.lease('snapshot', SNAPSHOT_LEASE_SECONDS)
+        consumers.wait_for_frame(seq, SNAPSHOT_WAIT_TIMEOUT)
+        frame, seq, frame_time, size = consumers.latest()
+    if frame is None:
+        return jsonify({"error": "No frame available"}), 503
+
+    width = snapshots.width_for(width, size[0])
+    etag = snapshots.etag(seq, width)
+    if not is_resource_modified(request.environ, etag=etag, last_modified=datetime.fromtimestamp(frame_time, timezone.utc)):
+        response = Response(status=304)
+    else:
+        # A list body is sent as it is, without copying the JPEG into bytes
+        data = snapshots.get(frame, seq, size, width)
+        response = Response([data], mimetype='image/jpeg')
+        response.content_length = len(data)
+    response.set_etag(etag)
+    response.last_modified = frame_time
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Frame-Seq'] = str(seq)
+    return response
+
+@app.route('/api/heatmap.png')
+def get_heatmap():
+    """
+    Occupancy heatmap as a transparent PNG overlay.
+
+    Without parameters this is the live, time-decayed map; ?start=<epoch> selects
+    a stored snapshot (see /api/heatmap/snapshots). ?width=N sets the image
+    width, the height follows the camera's aspect ratio.
+    """
+    _, _, _, size = consumers.latest()
+    frame_width, frame_height = size or CAMERA_RESOLUTION
+    width = min(max(request.args.get('width', frame_width, type=int), 16), 1920)
+    start = request.args.get('start', type=int)
+
+    png = heatmap.render_png((width, max(1, round(frame_height * width / frame_width))), start)
+    if png is None:
+        return jsonify({"error": "No heatmap snapshot for that time"}), 404
+    response = Response(png, mimetype='image/png')
+    # Snapshots never change; the live map is re-rendered every HEATMAP_RENDER_INTERVAL
+    response.headers['Cache-Control'] = f'max-age={86400 if start is not None else int(HEATMAP_RENDER_INTERVAL)}'
+    return response
+
+@app.route('/api/heatmap/snapshots')
+def get_heatmap_snapshots():
+    """Start times of the stored heatmap snapshots with the period length"""
+    return jsonify({
+        "interval": HEATMAP_SNAPSHOT_INTERVAL,
+        "snapshots": heatmap.snapshot_times()
+    })
+
+@app.route('/api/detections/latest')
+def latest_detections():
+    """Return the detection metadata of the most recent tracked frame"""
+    return jsonify(video_stream.last_metadata or {})
+
+def count_response(etag, body):
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/api/count')
+def get_count():
+    """Return the current count snapshot; answers 304 when the client's ETag is current"""
+    _, etag, body = count_publisher.snapshot()
+    if request.if_none_match.contains(etag):
+        return count_response(etag, b''), 304
+    return count_response(etag, body)
+
+@app.route('/api/count/poll')
+def poll_count():
+    """
+    Long-poll for the next count change.
+
+    Waits up to `timeout` seconds while the snapshot still matches `version`
+    (or the If-None-Match ETag), then returns the new snapshot, or 304 if
+    nothing changed.
+    """
+    try:
+        timeout = float(request.args.get('timeout', 30))
+        version = request.args.get('version', type=int)
+    except ValueError:
+        return jsonify({"error": "Invalid timeout"}), 400
+    # nan would never expire and block the hub
+    if not math.isfinite(timeout):
+        return jsonify({"error": "Invalid timeout"}), 400
+    timeout = max(0.0, min(timeout, COUNT_POLL_MAX_TIMEOUT))
+
+    current, etag, body = count_publisher.snapshot()
+    if version is None and request.if_none_match.contains(etag):
+        version = current
+    if version == current:
+        current, etag, body = count_publisher.wait(version, timeout)
+        if current == version:
+            return count_response(etag, b''), 304
+    return count_response(etag, body)
+
+@app.route('/api/count/stream')
+def stream_count():
+    """Server-sent events stream of count snapshots, one event per change"""
+    last_version = request.headers.get('Last-Event-ID', type=int)
+
+    def generate():
+        version = last_version
+        while True:
+            current, _, body = count_publisher.wait(version, COUNT_STREAM_KEEPALIVE)
+            if current == version:
+                yield b': keep-alive\n\n'
+                continue
+            version = current
+            yield b'id: %d\nevent: count\ndata: %s\n\n' % (current, body)
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# Responses whose small chunks must be sent as soon as they are produced
+UNBUFFERED_PATHS = {'/api/count/stream'}
+
+def unbuffered_streams(wsgi_app):
+    """
+    Turn off eventlet's 4 KB write coalescing for UNBUFFERED_PATHS.
+
+    This has to happen outside the Socket.IO middleware, which hands Flask a
+    copy of the WSGI environ.
+    """
+    def middleware(environ, start_response):
+        if environ.get('PATH_INFO') in UNBUFFERED_PATHS:
+            environ['eventlet.minimum_write_chunk_size'] = 0
+        return wsgi_app(environ, start_response)
+    return middleware
+
+app.wsgi_app = unbuffered_streams(app.wsgi_app)
+
+def admin_authorized():
+    """Check the bearer token against ADMIN_TOKEN in constant time"""
+    auth = request.headers.get('Authorization', '')
+    token = auth[len('Bearer '):] if auth.startswith('Bearer ') else ''
+    return hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+@app.route('/admin/profile', methods=['POST'])
+def admin_profile():
+    """
+    Profile the running process for `seconds` and return the results.
+
+    mode=sample (default) samples the stacks of all threads; mode=cprofile runs
+    cProfile while frames are processed (409 if no frame was processed
+    meanwhile, since the pipeline only runs while something consumes it). Its
+    times include hub wait and the other greenlets that ran while a frame was
+    yielding (see PipelineProfile). The JSON response holds the time per
+    pipeline stage and a top-N table; format=collapsed returns flamegraph-ready
+    collapsed stacks and format=pstats the raw cProfile data instead.
+    """
+    global pipeline_profile
+    if not ADMIN_TOKEN:
+        return jsonify({"error": "Admin API is disabled"}), 404
+    if not admin_authorized():
+        return jsonify({"error": "Unauthorized"}), 401
+
+    mode = request.args.get('mode', 'sample')
+    output_format = request.args.get('format', 'json')
+    try:
+        seconds = min(float(request.args.get('seconds', 10)), PROFILE_MAX_SECONDS)
+        limit = int(request.args.get('limit', 20))
+    except ValueError:
+        return jsonify({"error": "Invalid seconds or limit"}), 400
+    if mode not in ('sample', 'cprofile') or output_format not in ('json', 'collapsed', 'pstats'):
+        return jsonify({"error": "Unknown mode or format"}), 400
+
+    # One profile at a time
+    if not profile_lock.acquire(blocking=False):
+        return jsonify({"error": "A profile is already running"}), 409
+    try:
+        if mode == 'sample':
+            profiler = SamplingProfiler(PROFILE_SAMPLE_INTERVAL)
+            sampler = profiler.run(seconds)
+            while sampler.is_alive():
+                socketio.sleep(0.1)
+
+            if output_format == 'collapsed':
+                return Response(profiler.collapsed(), mimetype='text/plain', headers={
+                    'Content-Disposition': f'attachment; filename=profile_{int(time.time())}.collapsed'})
+            return jsonify({
+                "mode": mode,
+                "seconds": seconds,
+                "samples": profiler.samples,
+                "parked_samples": profiler.parked,
+                "stages": profiler.stage_summary(),
+                "top": profiler.top(limit)
+            })
+
+        pipeline_profile = PipelineProfile()
+        socketio.sleep(seconds)
+        profile, pipeline_profile = pipeline_profile, None
+        if not profile.frames:
+            return jsonify({"error": "Pipeline idle: no frames were processed"}), 409
+
+        if output_format == 'pstats':
+            return Response(profile.dump(), mimetype='application/octet-stream', headers={
+                'Content-Disposition': f'attachment; filename=profile_{int(time.time())}.pstats'})
+        return jsonify({
+            "mode": mode,
+            "seconds": seconds,
+            "frames": profile.frames,
+            "top": profile.top(limit)
+        })
+    finally:
+        profile_lock.release()
 
 def log_message(message):
     """Add a message to the logs with timestamp"""
@@ -206,35 +722,64 @@ def log_message(message):
     })
 
 def add_error(error_id, message, details):
-    """Add an error to the error list if it doesn't already exist"""
-    # Check if error with this ID already exists
-    for error in errors:
-        if error["id"] == error_id:
-            return
-    
-    errors.append({
-        "id": error_id,
-        "message": message,
-        "details": details,
-        "timestamp": datetime.now().isoformat()
-    })
-    socketio.emit('new_error', {
-        "id": error_id,
-        "message": message,
-        "details": details,
-        "timestamp": datetime.now().isoformat()
-    })
+    """Record an error occurrence; returns the event if clients were notified that it became active"""
+    return events.raise_event(error_id, message, details)
+
+def emit_event(event):
+    """Notify clients that an event was raised or resolved"""
+    if event["active"]:
+        socketio.emit('new_error', {
+            "id": event["id"],
+            "message": event["message"],
+            "details": event["details"],
+            "count": event["count"],
+            "timestamp": event["timestamp"]
+        })
+    else:
+        socketio.emit('error_resolved', {"id": event["id"]})
+
+def update_system_status(state, message):
+    """Set the system status and notify clients on changes, at most once per emit interval"""
+    global system_status, last_emitted_status
+    system_status = state
+    # Called once per frame with the final status, so the count snapshot changes at most once per frame
+    count_publisher.publish(stats["current_count"], state)
+    if state == last_emitted_status:
+        status_limiter.cancel('system_status')
+    elif status_limiter.allow('system_status'):
+        last_emitted_status = state
+        socketio.emit('system_status', {'state': state, 'message': message})
+    else:
+        # Sent by flush_notifications() once the interval has passed
+        status_limiter.defer('system_status', (state, message))
+
+def flush_notifications():
+    """Send the latest status and event transitions that rate limiting held back"""
+    global last_emitted_status
+    for _, (state, message) in status_limiter.flush():
+        last_emitted_status = state
+        socketio.emit('system_status', {'state': state, 'message': message})
+    events.flush()
+
+@socketio.on('connect')
+def handle_connect():
+    # Bring newly connected clients up to date without waiting for the next transition
+    emit('system_status', {'state': system_status, 'message': 'Current status'})
 
 @socketio.on('toggle_tracking')
 def handle_tracking(data):
     global video_stream
     video_stream.is_tracking = data['tracking']
+    if not video_stream.is_tracking:
+        video_stream.last_metadata = None
+    consumers.wake()
     log_message(f"Tracking {'started' if video_stream.is_tracking else 'stopped'}")
 
 @socketio.on('pause_video')
 def handle_pause(data):
     global is_paused
     is_paused = data['paused']
+    consumers.wake()
     log_message(f"Video feed {'paused' if is_paused else 'resumed'}")
 
 @socketio.on('change_camera')
@@ -246,6 +791,7 @@ def handle_camera_change(data):
             current_camera = new_camera
             # Recreate the video stream with the new camera
             video_stream = VideoCamera()
+            consumers.wake()
             log_message(f"Camera changed to {current_camera}")
     except Exception as e:
         add_error("camera-change-error", "Camera change failed", str(e))
@@ -263,6 +809,7 @@ def handle_save_config(data):
         if 'logging' in data:
             logging_enabled = data['logging'].get('enabled', True)
             logging_frequency = int(data['logging'].get('frequency', 60))
+            consumers.wake()
         
         log_message(f"Configuration updated: Sensitivity={sensitivity}, Logging={logging_enabled}, Frequency={logging_frequency}s")
     except Exception as e:
@@ -335,6 +882,27 @@ def export_logs_csv():
         download_name=f'person_counter_logs_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
     )
 
+@app.route('/api/trend')
+def get_trend():
+    """Return downsampled count history for a time range (default: the last 10 minutes)"""
+    now = time.time()
+    try:
+        end = float(request.args.get('end', now))
+        start = float(request.args.get('start', end - float(request.args.get('range', 600))))
+        max_points = min(int(request.args.get('points', 300)), 2000)
+    except ValueError:
+        return jsonify({"error": "Invalid range parameters"}), 400
+    if not (math.isfinite(start) and math.isfinite(end)) or max_points < 1:
+        return jsonify({"error": "Invalid range parameters"}), 400
+
+    resolution, points = count_rollups.query(start, end, max_points)
+    return jsonify({
+        "start": start,
+        "end": end,
+        "resolution": resolution,
+        "points": points
+    })
+
 @app.route('/get_all_logs')
 def get_all_logs():
     start_date = request.args.get('start_date')
@@ -360,20 +928,26 @@ def get_all_logs():
 
 @app.route('/get_all_errors')
 def get_all_errors():
-    return jsonify(errors)
+    return jsonify(events.active_events())
+
+@app.route('/api/clips')
+def get_clips():
+    return jsonify(list(clip_recorder.saved_clips) if clip_recorder else [])
+
+@app.route('/api/events/history')
+def get_event_history():
+    return jsonify(events.recent_history())
 
 @socketio.on('clear_errors')
 def handle_clear_errors():
-    global errors
-    errors = []
+    events.clear()
     log_message("All errors cleared")
 
 @socketio.on('resolve_error')
 def handle_resolve_error(data):
-    global errors
     error_id = data.get('id')
     if error_id:
-        errors = [error for error in errors if error['id'] != error_id]
+        events.resolve(error_id)
         log_message(f"Error {error_id} resolved")
 
 if __name__ == '__main__':
@@ -387,10 +961,12 @@ if __name__ == '__main__':
             break
         except Exception as e:
             if attempt < max_retries - 1:
-                print(f"Failed to initialize camera (attempt {attempt + 1}/{max_retries}). Retrying in {retry_delay} seconds...")
+                logger.warning("Failed to initialize camera (attempt %d/%d). Retrying in %s seconds...",
+                               attempt + 1, max_retries, retry_delay)
                 time.sleep(retry_delay)
             else:
-                print(f"Failed to initialize camera after {max_retries} attempts. Last error: {str(e)}")
+                logger.error("Failed to initialize camera after %d attempts. Last error: %s", max_retries, e)
                 raise
     
-    socketio.run(app, debug=False, host='0.0.0.0')
\ No newline at end of file
+    start()
+    socketio.run(app, debug=False, host='0.0.0.0', port=WEB_PORT)
\ No newline at end of file
@@ -0,0 +1,10 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules import each other relative to src/, as when the scripts are run
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+# Tests that load web_app use the synthetic camera instead of a video device
+os.environ.setdefault("PERSON_COUNTER_CAMERA", "synthetic")
@@ -0,0 +1,47 @@
+import cv2
+import numpy as np
+import pytest
+
+import batch_count
+from utils.recorder import write_mjpeg_avi
+
+
+def jpeg_frames(count):
+    return [cv2.imencode('.jpg', np.full((48, 64, 3), i * 5 % 256, dtype=np.uint8))[1].tobytes()
+            for i in range(count)]
+
+
+@pytest.fixture
+def no_detections(monkeypatch):
+    class Detector:
+        def detect(self, frame):
+            return []
+    monkeypatch.setattr(batch_count, "worker_detector", Detector())
+
+
+def test_raw_stream_without_frame_count_becomes_one_open_segment(tmp_path, no_detections):
+    path = str(tmp_path / "raw.mjpeg")
+    with open(path, 'wb') as f:
+        for jpeg in jpeg_frames(20):
+            f.write(jpeg)
+
+    segments = batch_count.plan_segments(path, segment_seconds=0.2, warmup_frames=2)
+    assert len(segments) == 1
+    assert segments[0]["start"] == 0 and segments[0]["end"] is None
+
+    _, seconds, processed, covered = batch_count.process_segment(segments[0])
+    assert processed == covered == 20
+    assert sum(bucket["frames"] for bucket in seconds.values()) == 20
+
+
+def test_warmup_frames_are_not_counted_as_processed(tmp_path, no_detections):
+    path = str(tmp_path / "clip.avi")
+    write_mjpeg_avi(path, [(i / 10, jpeg) for i, jpeg in enumerate(jpeg_frames(40))], 64, 48)
+
+    segments = batch_count.plan_segments(path, segment_seconds=2.0, warmup_frames=5)
+    assert [(segment["start"], segment["end"], segment["warmup_start"]) for segment in segments] == \
+        [(0, 20, 0), (20, 40, 15)]
+
+    _, seconds, processed, covered = batch_count.process_segment(segments[1])
+    assert processed == covered == 20
+    assert sorted(seconds) == [2, 3]
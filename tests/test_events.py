@@ -0,0 +1,80 @@
+from utils.events import EventRegistry, RateLimiter
+
+
+def test_rate_limiter_flushes_latest_deferred_value_after_interval():
+    limiter = RateLimiter(5)
+    assert limiter.allow("status", now=100)
+    assert not limiter.allow("status", now=101)
+    limiter.defer("status", "Warning")
+    limiter.defer("status", "Active")
+
+    assert limiter.flush(now=104) == []
+    assert limiter.flush(now=105) == [("status", "Active")]
+    assert limiter.flush(now=200) == []
+
+
+def test_rate_limiter_cancel_drops_deferred_value():
+    limiter = RateLimiter(5)
+    limiter.allow("status", now=100)
+    limiter.defer("status", "Warning")
+    limiter.cancel("status")
+    assert limiter.flush(now=110) == []
+
+
+def make_registry(interval=5.0):
+    sent = []
+    registry = EventRegistry(emit_interval=interval, notify=sent.append)
+    return registry, sent
+
+
+def states(sent):
+    return [(event["id"], event["active"]) for event in sent]
+
+
+def test_raise_and_resolve_notify_clients():
+    registry, sent = make_registry(interval=0)
+    assert registry.raise_event("low-fps", "Low frame rate", "details") is not None
+    assert registry.raise_event("low-fps", "Low frame rate", "details") is None
+    assert registry.resolve("low-fps")
+    assert not registry.resolve("low-fps")
+
+    assert states(sent) == [("low-fps", True), ("low-fps", False)]
+    assert registry.events["low-fps"]["count"] == 2
+
+
+def test_suppressed_resolve_is_sent_when_the_interval_expires():
+    registry, sent = make_registry()
+    registry.raise_event("camera-disconnected", "Camera disconnected", "")
+    registry.resolve("camera-disconnected")
+    assert states(sent) == [("camera-disconnected", True)]
+
+    registry.flush(now=registry.limiter.last_allowed["camera-disconnected"] + 5)
+    assert states(sent) == [("camera-disconnected", True), ("camera-disconnected", False)]
+
+
+def test_suppressed_raise_is_sent_when_the_interval_expires():
+    registry, sent = make_registry()
+    registry.raise_event("low-fps", "Low frame rate", "")
+    registry.resolve("low-fps")
+    registry.raise_event("low-fps", "Low frame rate", "again")
+    registry.resolve("low-fps")
+    assert registry.raise_event("low-fps", "Low frame rate", "still") is None
+
+    registry.flush(now=registry.limiter.last_allowed["low-fps"] + 5)
+    # Clients already know the event is active, so nothing more is sent
+    assert states(sent) == [("low-fps", True)]
+
+    registry.resolve("low-fps")
+    registry.flush(now=registry.limiter.last_allowed["low-fps"] + 10)
+    assert states(sent) == [("low-fps", True), ("low-fps", False)]
+
+
+def test_clear_resolves_active_events_and_keeps_history():
+    registry, sent = make_registry(interval=0)
+    registry.raise_event("a", "A", "")
+    registry.raise_event("b", "B", "")
+    registry.clear()
+
+    assert registry.active_events() == []
+    assert [entry["state"] for entry in registry.recent_history()] == ["raised", "raised", "resolved", "resolved"]
+    assert sorted(states(sent)) == [("a", False), ("a", True), ("b", False), ("b", True)]
@@ -0,0 +1,44 @@
+import pytest
+
+from utils.heatmap import OccupancyHeatmap
+
+# One person whose foot point falls into grid cell (row 3, col 1) of a 4x4 grid
+PERSON = [[20, 40, 10, 35]]
+FRAME = (100, 100)
+
+
+def test_detections_decay_with_the_half_life():
+    heatmap = OccupancyHeatmap((4, 4), half_life=10.0)
+    heatmap.add(PERSON, FRAME, timestamp=0.0)
+    heatmap.add(PERSON, FRAME, timestamp=1.0)
+
+    assert heatmap.current(now=1.0)[3, 1] == pytest.approx(1.0)
+    assert heatmap.current(now=11.0)[3, 1] == pytest.approx(0.5)
+    assert heatmap.current(now=21.0).sum() == pytest.approx(0.25)
+
+
+def test_renormalization_keeps_the_decayed_values():
+    heatmap = OccupancyHeatmap((4, 4), half_life=1.0)
+    timestamps = [index * 0.5 for index in range(200)]
+    for timestamp in timestamps:
+        heatmap.add(PERSON, FRAME, timestamp=timestamp)
+
+    # Weights would have grown by 2^100 without folding them back into the grid
+    assert heatmap.reference_time > 0
+    assert heatmap.grid.max() < 1e7
+    now = timestamps[-1]
+    expected = sum(0.5 * 2 ** -(now - timestamp) for timestamp in timestamps[1:])
+    assert heatmap.current(now=now)[3, 1] == pytest.approx(expected)
+    assert heatmap.current(now=now + 3)[3, 1] == pytest.approx(expected / 8)
+
+
+def test_undecayed_snapshot_per_period():
+    heatmap = OccupancyHeatmap((4, 4), half_life=1.0, snapshot_interval=10)
+    for timestamp in (1.0, 2.0, 3.0, 12.0):
+        heatmap.add(PERSON, FRAME, timestamp=timestamp)
+
+    assert heatmap.snapshot_times() == [0]
+    assert heatmap.snapshot(0)[3, 1] == pytest.approx(2.0)
+    assert heatmap.snapshot(10) is None
+    # The frame after the gap counts for at most one second, in the new period
+    assert heatmap.period_grid.sum() == pytest.approx(1.0)
@@ -0,0 +1,71 @@
+import logging
+
+from utils.log import RateLimitFilter, NonBlockingQueueHandler, NativeQueueListener, _set_level
+from utils.threads import queue
+
+
+def make_record(created, msg="Frame %d failed", args=(1,)):
+    record = logging.LogRecord("camera", logging.WARNING, "", 0, msg, args, None)
+    record.created = created
+    return record
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def test_burst_then_suppressed_count_on_next_window():
+    limit = RateLimitFilter(interval=10.0, burst=2)
+    passed = [limit.filter(make_record(t)) for t in (0.0, 1.0, 2.0, 3.0)]
+    assert passed == [True, True, False, False]
+
+    record = make_record(10.0)
+    assert limit.filter(record)
+    assert record.suppressed == 2
+
+
+def test_expired_windows_are_removed_and_report_their_count():
+    limit = RateLimitFilter(interval=10.0, burst=1)
+    for t in (0.0, 1.0, 2.0):
+        limit.filter(make_record(t))
+    limit.filter(make_record(5.0, msg="Other message", args=None))
+
+    assert limit.expire(now=9.0) == []
+    summaries = limit.expire(now=10.0)
+    assert [(r.name, r.levelno, r.getMessage(), r.suppressed) for r in summaries] == \
+        [("camera", logging.WARNING, "Frame %d failed", 2)]
+    assert list(limit.windows) == [("camera", logging.WARNING, "Other message")]
+
+    assert limit.expire() == []
+    assert limit.windows == {}
+
+
+def test_listener_writes_pending_suppressed_counts_when_stopped():
+    log_queue = queue.Queue()
+    limit = RateLimitFilter(interval=60.0, burst=1)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(limit)
+    output = ListHandler()
+    listener = NativeQueueListener(log_queue, output, rate_limit=limit)
+    listener.start()
+
+    for _ in range(4):
+        queue_handler.handle(logging.LogRecord("camera", logging.WARNING, "", 0, "Capture failed", None, None))
+    listener.stop()
+
+    assert [record.getMessage() for record in output.records] == ["Capture failed", "Capture failed"]
+    assert output.records[-1].suppressed == 3
+
+
+def test_unknown_level_falls_back_to_info():
+    logger = logging.getLogger("test_log.unknown_level")
+    _set_level(logger, "loud")
+    assert logger.level == logging.INFO
+
+    _set_level(logger, "debug")
+    assert logger.level == logging.DEBUG
@@ -0,0 +1,119 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+from detector import pool as pool_module
+from detector.pool import DetectorPool, ReorderBuffer
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+# Stands in for detector/worker.py without loading a network: it answers with
+# one box per frame and exits when it is sent a negative threshold
+FAKE_WORKER = f"""
+import os
+import sys
+sys.path.insert(0, {SRC!r})
+from detector.worker import encode_message, read_message
+
+stdout = sys.stdout.buffer
+stdout.write(encode_message(("ready", os.getpid())))
+stdout.flush()
+while True:
+    message = read_message(sys.stdin.buffer)
+    if message is None:
+        break
+    seq, frame, threshold = message
+    if threshold < 0:
+        os._exit(1)
+    stdout.write(encode_message((seq, [[seq, 0, 1, 1]], None, {{}})))
+    stdout.flush()
+"""
+
+FRAME = np.zeros((4, 4, 3), dtype=np.uint8)
+
+
+def test_reorder_buffer_releases_results_in_submission_order():
+    buffer = ReorderBuffer()
+    for seq in (1, 2, 3):
+        buffer.expect(seq, f"context-{seq}")
+    buffer.put(3, ("three",))
+    buffer.put(2, ("two",))
+    assert buffer.pop_ready() == []
+    buffer.put(1, ("one",))
+    assert buffer.pop_ready() == [(1, "context-1", "one"), (2, "context-2", "two"), (3, "context-3", "three")]
+    assert len(buffer) == 0
+
+
+@pytest.fixture
+def fake_pool(tmp_path, monkeypatch):
+    script = tmp_path / "fake_worker.py"
+    script.write_text(FAKE_WORKER)
+    monkeypatch.setattr(pool_module, "WORKER_SCRIPT", str(script))
+    pools = []
+
+    def make(**kwargs):
+        pool = DetectorPool(**kwargs)
+        pools.append(pool)
+        assert pool.wait_ready(timeout=20) == len(pool.workers)
+        return pool
+
+    yield make
+    for pool in pools:
+        pool.close()
+
+
+def collect_until(pool, count, timeout=10):
+    results = []
+    deadline = time.time() + timeout
+    while len(results) < count and time.time() < deadline:
+        results.extend(pool.collect(timeout=0.1))
+    return results
+
+
+def test_exited_worker_fails_its_frames_and_is_restarted(fake_pool):
+    pool = fake_pool(workers=1, restart_delay=0.2)
+    assert pool.submit(1, FRAME, -1.0)
+
+    [(seq, _, detections, error, _)] = collect_until(pool, 1)
+    assert (seq, detections, error) == (1, None, "Detector worker exited")
+    assert not pool.available()
+    assert not pool.submit(2, FRAME, 0.5)
+
+    deadline = time.time() + 10
+    while not pool.ready_workers() and time.time() < deadline:
+        pool.collect(timeout=0.1)
+    assert pool.available()
+    assert pool.submit(3, FRAME, 0.5)
+    assert [result[0] for result in collect_until(pool, 1)] == [3]
+
+
+def test_restart_delay_doubles_with_consecutive_failures(fake_pool):
+    pool = fake_pool(workers=1, restart_delay=0.2, max_restart_delay=0.3)
+    worker = pool.workers[0]
+    pool.submit(1, FRAME, -1.0)
+    collect_until(pool, 1)
+    assert worker["failures"] == 1
+    assert 0.1 < worker["restart_at"] - time.time() <= 0.2
+
+    while not pool.ready_workers():
+        pool.collect(timeout=0.05)
+    pool.submit(2, FRAME, -1.0)
+    collect_until(pool, 1)
+    # The second delay would be 0.4 s, capped at max_restart_delay
+    assert worker["failures"] == 2
+    assert 0.2 < worker["restart_at"] - time.time() <= 0.3
+
+
+def test_results_from_an_earlier_session_are_dropped(fake_pool):
+    pool = fake_pool(workers=1, max_in_flight=4)
+    assert pool.submit(1, FRAME, 0.5, context="old")
+    pool.new_session()
+    assert pool.submit(2, FRAME, 0.5, context="new")
+
+    results = collect_until(pool, 1)
+    time.sleep(0.2)
+    results.extend(pool.collect(timeout=0.1))
+    assert [(seq, context) for seq, context, _, _, _ in results] == [(2, "new")]
+    assert pool.workers[0]["in_flight"] == {}
@@ -0,0 +1,29 @@
+from utils.profiler import SamplingProfiler, PipelineProfile
+from utils.threads import threading
+
+
+def test_empty_pipeline_profile_reports_nothing():
+    profile = PipelineProfile()
+    assert profile.frames == 0
+    assert profile.top() == ""
+
+
+def test_sampling_skips_threads_parked_in_a_wait():
+    stop = threading.Event()
+    parked = threading.Thread(target=stop.wait, name="parked", daemon=True)
+    parked.start()
+
+    def spin():
+        while not stop.is_set():
+            sum(range(1000))
+    busy = threading.Thread(target=spin, name="busy", daemon=True)
+    busy.start()
+
+    profiler = SamplingProfiler(0.001)
+    profiler.run(0.3).join()
+    stop.set()
+
+    threads = {stack[0] for stack in profiler.stacks}
+    assert "busy" in threads
+    assert "parked" not in threads
+    assert profiler.parked > 0
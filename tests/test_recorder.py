@@ -0,0 +1,74 @@
+import struct
+
+import cv2
+import numpy as np
+
+from utils.recorder import ClipRecorder, write_mjpeg_avi
+
+
+def encoded_frames(count, width=64, height=48):
+    frames = []
+    for i in range(count):
+        image = np.full((height, width, 3), i * 40, dtype=np.uint8)
+        _, jpeg = cv2.imencode('.jpg', image)
+        frames.append((100.0 + i / 10, jpeg.tobytes()))
+    return frames
+
+
+def test_write_mjpeg_avi_produces_a_readable_indexed_file(tmp_path):
+    frames = encoded_frames(5)
+    # Odd-sized chunks are padded to keep the RIFF structure aligned; decoders ignore trailing bytes
+    timestamp, jpeg = frames[1]
+    frames[1] = (timestamp, jpeg + b'\0' * (1 - len(jpeg) % 2))
+    path = str(tmp_path / "clip.avi")
+    write_mjpeg_avi(path, frames, 64, 48)
+
+    data = open(path, 'rb').read()
+    assert data[:4] == b'RIFF' and data[8:12] == b'AVI '
+    assert struct.unpack('<I', data[4:8])[0] == len(data) - 8
+
+    # Every index entry points at a '00dc' chunk of the recorded length
+    movi = data.index(b'movi')
+    idx = data.index(b'idx1')
+    entries = struct.unpack('<I', data[idx + 4:idx + 8])[0] // 16
+    assert entries == len(frames)
+    for i, (_, jpeg) in enumerate(frames):
+        _, _, offset, size = struct.unpack('<4sIII', data[idx + 8 + 16 * i:idx + 24 + 16 * i])
+        assert data[movi + offset:movi + offset + 4] == b'00dc'
+        assert size == len(jpeg)
+        assert data[movi + offset + 8:movi + offset + 8 + size] == jpeg
+
+    capture = cv2.VideoCapture(path)
+    decoded = 0
+    while capture.read()[0]:
+        decoded += 1
+    assert decoded == len(frames)
+
+
+def test_pre_roll_ring_is_bounded_by_time_and_memory():
+    recorder = ClipRecorder("unused", memory_budget=2000, pre_roll=1.0, post_roll=1.0)
+    for i in range(20):
+        recorder.push(b'x' * 100, 100.0 + i * 0.1, (64, 48))
+
+    assert recorder.frames[-1][0] - recorder.frames[0][0] <= 1.0
+    assert recorder.ring_bytes <= 1000
+
+    recorder.push(b'x' * 900, 102.0, (64, 48))
+    assert recorder.ring_bytes <= 1000
+
+
+def test_trigger_collects_post_roll_then_hands_clip_to_writer(monkeypatch):
+    recorder = ClipRecorder("unused", memory_budget=100000, pre_roll=1.0, post_roll=0.5)
+    monkeypatch.setattr(recorder, "_start_writer", lambda: None)
+    for i in range(5):
+        recorder.push(b'x' * 10, 100.0 + i * 0.1, (64, 48))
+
+    assert recorder.trigger("test", 100.4)
+    recorder.push(b'x' * 10, 100.6, (64, 48))
+    assert recorder.is_recording()
+    recorder.push(b'x' * 10, 100.9, (64, 48))
+
+    assert not recorder.is_recording()
+    clip = recorder.write_queue.get_nowait()
+    assert [timestamp for timestamp, _, _ in clip["frames"]][-2:] == [100.6, 100.9]
+    assert clip["bytes"] == 10 * len(clip["frames"])
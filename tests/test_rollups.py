@@ -0,0 +1,71 @@
+import pytest
+
+from utils.rollups import RollupSeries
+
+NOW = 1_700_000_000
+
+
+def filled_series(span, step):
+    series = RollupSeries()
+    t = NOW - span
+    while t <= NOW:
+        series.add(int(t) % 7, t)
+        t += step
+    return series
+
+
+@pytest.mark.parametrize("span, step, resolution", [
+    (600, 1, 2),                  # last 10 minutes
+    (3600, 1, 20),                # last hour
+    (86400, 10, 300),             # last 24 hours
+    (7 * 86400, 60, 2100),        # last 7 days
+    (30 * 86400, 300, 3 * 3600),  # last 30 days
+])
+def test_query_fills_but_never_exceeds_max_points(span, step, resolution):
+    series = filled_series(span, step)
+    result_resolution, points = series.query(NOW - span, NOW, 300)
+
+    assert result_resolution == resolution
+    assert 0.5 * 300 <= len(points) <= 300
+    times = [point["t"] for point in points]
+    assert times == sorted(times)
+    assert all(t % resolution == 0 for t in times)
+
+
+def test_query_uses_native_buckets_when_they_fit():
+    series = filled_series(120, 1)
+    resolution, points = series.query(NOW - 120, NOW, 300)
+    assert resolution == 1
+    assert len(points) == 121
+
+
+def test_bucket_boundaries_and_merged_aggregates():
+    series = RollupSeries(levels=((60, 100),))
+    series.add(4, 59.9)
+    series.add(2, 60.0)
+    series.add(8, 119.9)
+    series.add(5, 120.0)
+
+    _, points = series.query(0, 179, 10)
+    assert points == [
+        {"t": 0, "min": 4, "avg": 4.0, "max": 4},
+        {"t": 60, "min": 2, "avg": 5.0, "max": 8},
+        {"t": 120, "min": 5, "avg": 5.0, "max": 5},
+    ]
+
+    # Two minutes per point: the average is weighted by samples, not by bucket
+    resolution, points = series.query(0, 239, 2)
+    assert resolution == 120
+    assert points == [
+        {"t": 0, "min": 2, "avg": round(14 / 3, 2), "max": 8},
+        {"t": 120, "min": 5, "avg": 5.0, "max": 5},
+    ]
+
+
+def test_query_includes_the_bucket_overlapping_the_start():
+    series = RollupSeries(levels=((60, 100),))
+    series.add(1, 30)
+    series.add(2, 90)
+    _, points = series.query(45, 100, 10)
+    assert [point["t"] for point in points] == [0, 60]
+    assert series.query(60, 100, 10)[1][0]["t"] == 60
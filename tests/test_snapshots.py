@@ -0,0 +1,26 @@
+import cv2
+import numpy as np
+
+from utils.snapshots import SnapshotCache
+
+
+def test_requested_widths_are_rounded_up_to_allowed_widths():
+    cache = SnapshotCache(widths=(160, 320, 640))
+    assert cache.width_for(None, 1280) is None
+    assert cache.width_for(1, 1280) == 160
+    assert cache.width_for(161, 1280) == 320
+    assert cache.width_for(640, 1280) == 640
+    # Wider than every allowed width, or not narrower than the frame: full size
+    assert cache.width_for(641, 1280) is None
+    assert cache.width_for(300, 320) is None
+
+
+def test_downscaled_snapshot_is_made_once_per_frame():
+    cache = SnapshotCache(widths=(160,))
+    jpeg = memoryview(cv2.imencode('.jpg', np.zeros((480, 640, 3), dtype=np.uint8))[1].reshape(-1))
+
+    first = cache.get(jpeg, 1, (640, 480), 160)
+    assert cache.get(jpeg, 1, (640, 480), 160) is first
+    assert cv2.imdecode(np.frombuffer(first, dtype=np.uint8), cv2.IMREAD_COLOR).shape == (120, 160, 3)
+    assert cache.get(jpeg, 2, (640, 480), 160) is not first
+    assert cache.get(jpeg, 2, (640, 480), None) is jpeg
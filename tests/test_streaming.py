@@ -0,0 +1,26 @@
+import eventlet
+import numpy as np
+from eventlet.green import socket
+
+from utils.streaming import send_buffers
+
+
+def test_send_buffers_resumes_partial_writes_in_order():
+    sender, receiver = socket.socketpair()
+    # A small send buffer forces partial writes and waits on the hub
+    sender.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+    frame = np.random.default_rng(0).integers(0, 255, 300000, dtype=np.uint8)
+    buffers = [b'header\r\n', memoryview(frame), b'', b'\r\n']
+    expected = b''.join(bytes(buffer) for buffer in buffers)
+
+    def read_all():
+        received = bytearray()
+        while len(received) < len(expected):
+            received.extend(receiver.recv(65536))
+        return bytes(received)
+
+    reader = eventlet.spawn(read_all)
+    send_buffers(sender, buffers)
+    assert reader.wait() == expected
+    sender.close()
+    receiver.close()
@@ -0,0 +1,52 @@
+import numpy as np
+
+from detector.yolo import tile_grid, merge_tile_detections
+
+
+def detections(*boxes):
+    return np.array(boxes, dtype=np.int32).reshape(-1, 4), np.full(len(boxes), 0.8, dtype=np.float32)
+
+
+def test_tile_grid_covers_the_frame_with_overlapping_tiles():
+    tiles = tile_grid(1920, 1080, 416, 64)
+    xs = sorted({x for x, _, _, _ in tiles})
+    ys = sorted({y for _, y, _, _ in tiles})
+
+    assert len(tiles) == len(xs) * len(ys)
+    assert xs[0] == 0 and xs[-1] + 416 == 1920
+    assert ys[0] == 0 and ys[-1] + 416 == 1080
+    assert all(b - a <= 416 - 64 for a, b in zip(xs, xs[1:]))
+    assert all(b - a <= 416 - 64 for a, b in zip(ys, ys[1:]))
+
+
+def test_tile_grid_small_frame_is_one_tile():
+    assert tile_grid(320, 240, 416, 64) == [(0, 0, 320, 240)]
+
+
+def test_partial_box_is_dropped_when_a_neighbour_sees_the_whole_person():
+    # Two tiles side by side sharing x 352..416 of an 768x416 frame
+    tiles = [(0, 0, 416, 416), (352, 0, 416, 416)]
+    left = detections((380, 100, 36, 120))   # cut by the left tile's right border
+    right = detections((370, 100, 30, 120))  # whole person inside the overlap
+    boxes, _ = merge_tile_detections(tiles, [left[0], right[0]], [left[1], right[1]], 768, 416)
+
+    assert boxes.tolist() == [[370, 100, 30, 120]]
+
+
+def test_partial_boxes_of_a_person_wider_than_the_overlap_are_merged():
+    tiles = [(0, 0, 416, 416), (352, 0, 416, 416)]
+    left = detections((320, 100, 96, 200))   # x 320..416
+    right = detections((352, 100, 100, 200))  # x 352..452
+    boxes, confidences = merge_tile_detections(tiles, [left[0], right[0]], [left[1], right[1]], 768, 416)
+
+    assert boxes.tolist() == [[320, 100, 132, 200]]
+    assert len(confidences) == 1
+
+
+def test_boxes_at_frame_borders_and_apart_are_kept():
+    tiles = [(0, 0, 416, 416), (352, 0, 416, 416)]
+    left = detections((0, 0, 40, 100), (100, 300, 40, 116))
+    right = detections((700, 50, 68, 100))
+    boxes, _ = merge_tile_detections(tiles, [left[0], right[0]], [left[1], right[1]], 768, 416)
+
+    assert sorted(boxes.tolist()) == [[0, 0, 40, 100], [100, 300, 40, 116], [700, 50, 68, 100]]
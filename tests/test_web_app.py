@@ -0,0 +1,171 @@
+import os
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def web_app():
+    if not os.path.exists(os.path.join(ROOT, "models", "yolov4-tiny.weights")):
+        pytest.skip("YOLO model files are not available")
+    # The detector loads its model relative to the repository root
+    cwd = os.getcwd()
+    os.chdir(ROOT)
+    try:
+        import web_app
+    finally:
+        os.chdir(cwd)
+    return web_app
+
+
+def test_frame_seq_keeps_increasing_across_camera_change(web_app):
+    first = web_app.VideoCamera()
+    first.get_frame()
+    first.get_frame()
+
+    second = web_app.VideoCamera()
+    second.get_frame()
+
+    assert first.frame_seq > 0
+    assert second.frame_seq > first.frame_seq
+
+
+def test_status_change_suppressed_by_rate_limit_is_sent_later(web_app, monkeypatch):
+    emitted = []
+    monkeypatch.setattr(web_app.socketio, "emit", lambda event, data: emitted.append((event, data)))
+    monkeypatch.setattr(web_app, "status_limiter", web_app.RateLimiter(60))
+    monkeypatch.setattr(web_app, "last_emitted_status", "Active")
+
+    web_app.update_system_status("Warning", "Low frame rate")
+    web_app.update_system_status("Active", "Idle, no consumers")
+    web_app.update_system_status("Warning", "Low frame rate")
+    assert emitted == [("system_status", {"state": "Warning", "message": "Low frame rate"})]
+
+    web_app.update_system_status("Active", "Idle, no consumers")
+    web_app.status_limiter.last_allowed["system_status"] -= 60
+    web_app.flush_notifications()
+    assert emitted[-1] == ("system_status", {"state": "Active", "message": "Idle, no consumers"})
+    assert web_app.last_emitted_status == "Active"
+
+
+def test_cprofile_of_idle_pipeline_is_a_conflict(web_app, monkeypatch):
+    monkeypatch.setattr(web_app, "ADMIN_TOKEN", "secret")
+    response = web_app.app.test_client().post("/admin/profile?mode=cprofile&seconds=0.1",
+                                              headers={"Authorization": "Bearer secret"})
+    assert response.status_code == 409
+
+
+def test_count_poll_rejects_non_finite_timeout(web_app):
+    client = web_app.app.test_client()
+    version, _, _ = web_app.count_publisher.snapshot()
+    for timeout in ("nan", "inf", "-inf"):
+        response = client.get(f"/api/count/poll?version={version}&timeout={timeout}")
+        assert response.status_code == 400
+    assert client.get(f"/api/count/poll?version={version}&timeout=-3").status_code == 304
+
+
+def test_log_only_frame_skips_tracking_and_broadcasts(web_app, monkeypatch):
+    emitted = []
+    monkeypatch.setattr(web_app.socketio, "emit", lambda event, *args, **kwargs: emitted.append(event))
+    monkeypatch.setattr(web_app, "logs", [])
+    monkeypatch.setattr(web_app, "logging_enabled", True)
+    monkeypatch.setattr(web_app, "last_log_time", web_app.datetime.now() - web_app.timedelta(hours=1))
+    counts = list(web_app.stats["total_counts"])
+    camera = web_app.VideoCamera()
+
+    assert camera.needs_inference()
+    camera.get_frame()
+
+    assert len(web_app.logs) == 1
+    assert "detections" not in emitted and "stats_update" not in emitted
+    assert web_app.stats["total_counts"] == counts
+
+
+def test_trend_rejects_non_finite_ranges_and_empty_point_counts(web_app):
+    client = web_app.app.test_client()
+    for query in ("range=nan", "range=inf", "end=nan", "start=-inf", "points=0", "range=abc"):
+        assert client.get(f"/api/trend?{query}").status_code == 400
+    response = client.get("/api/trend?range=60&points=10")
+    assert response.status_code == 200
+    assert response.get_json()["end"] - response.get_json()["start"] == 60
+
+
+def test_count_etag_answers_304_when_current(web_app):
+    client = web_app.app.test_client()
+    response = client.get("/api/count")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert response.get_json()["version"] == web_app.count_publisher.snapshot()[0]
+
+    assert client.get("/api/count", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_count_poll_returns_the_snapshot_published_while_waiting(web_app):
+    import eventlet
+
+    client = web_app.app.test_client()
+    version, _, _ = web_app.count_publisher.snapshot()
+    count = web_app.count_publisher.state[0] + 1
+    eventlet.spawn_after(0.1, web_app.count_publisher.publish, count, "Active")
+
+    response = client.get(f"/api/count/poll?version={version}&timeout=5")
+    assert response.status_code == 200
+    assert response.get_json()["version"] > version
+    assert response.get_json()["count"] == count
+
+
+def test_count_poll_times_out_with_304_and_rejects_bad_timeouts(web_app):
+    client = web_app.app.test_client()
+    version, etag, _ = web_app.count_publisher.snapshot()
+    assert client.get(f"/api/count/poll?version={version}&timeout=0.1").status_code == 304
+    assert client.get("/api/count/poll?timeout=0.1", headers={"If-None-Match": f'"{etag}"'}).status_code == 304
+    assert client.get(f"/api/count/poll?version={version}&timeout=soon").status_code == 400
+
+
+@pytest.fixture
+def idle_camera(web_app, monkeypatch):
+    """A camera with no viewers, leases, tracking or due log entry"""
+    monkeypatch.setattr(web_app, "consumers", web_app.ConsumerTracker())
+    monkeypatch.setattr(web_app, "logging_enabled", True)
+    monkeypatch.setattr(web_app, "last_log_time", web_app.datetime.now())
+    monkeypatch.setattr(web_app.socketio, "emit", lambda *args, **kwargs: None)
+    return web_app.VideoCamera()
+
+
+def test_encoding_follows_viewers_and_leases(web_app, idle_camera):
+    assert not idle_camera.needs_encoding()
+    assert not idle_camera.has_demand()
+
+    web_app.consumers.add_viewer()
+    assert idle_camera.needs_encoding()
+    web_app.consumers.remove_viewer()
+    assert not idle_camera.needs_encoding()
+
+    web_app.consumers.lease("test", 60)
+    assert idle_camera.needs_encoding()
+
+
+def test_inference_follows_tracking_and_due_log_entries(web_app, idle_camera, monkeypatch):
+    assert not idle_camera.needs_inference()
+
+    idle_camera.is_tracking = True
+    assert idle_camera.needs_inference()
+    idle_camera.is_tracking = False
+
+    monkeypatch.setattr(web_app, "last_log_time", web_app.datetime.now() - web_app.timedelta(hours=1))
+    assert idle_camera.needs_inference()
+    monkeypatch.setattr(web_app, "logging_enabled", False)
+    assert not idle_camera.needs_inference()
+
+
+def test_frame_needed_only_for_inference_is_not_encoded(web_app, idle_camera, monkeypatch):
+    monkeypatch.setattr(web_app, "logs", [])
+    monkeypatch.setattr(web_app, "last_log_time", web_app.datetime.now() - web_app.timedelta(hours=1))
+    assert idle_camera.needs_inference() and not idle_camera.needs_encoding()
+
+    assert idle_camera.get_frame() is None
+    assert not idle_camera.capture_failed
+    assert idle_camera.last_frame is None
+    assert web_app.consumers.latest()[0] is None
+    assert len(web_app.logs) == 1